@@ -9,7 +9,6 @@ from typing import Any, Dict, TYPE_CHECKING, Union, Sequence, List
 
 import voluptuous as vol
 from homeassistant import config_entries
-from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
 from homeassistant.config_entries import ConfigEntry, SOURCE_IMPORT
 from homeassistant.const import CONF_NAME, CONF_ENTITY_ID, CONF_MAXIMUM, CONF_MINIMUM
 from homeassistant.core import callback
@@ -27,9 +26,13 @@ from .const import (
     ATTR_LAST_ACTION_TARGETS, ATTR_LAST_ACTION_TIME,
     ATTR_LAST_SYNC_TIME, DATA_CONFIG,
     CONF_DIAGNOSTICS_MODE, CONF_ENTITY_MODES, CONF_MAPPING, CONF_SET_SCRIPT, CONF_PROGRAMS, CONF_MULTIPLIER,
-    CONF_ENTITY_RANGES, CONF_PRECISION, MODES_NUMERIC
+    CONF_ENTITY_RANGES, CONF_PRECISION, MODES_NUMERIC, CONF_RATE_LIMITS, CONF_RATE, CONF_BURST,
+    RATE_LIMIT_ENDPOINTS, CONF_QUERY_CACHE_TTL, CONF_SERIALIZE_IN_EXECUTOR, CONF_SYNC_LIMIT, CONF_MAX_DEVICES,
+    CONF_MAX_BYTES, CONF_PRIORITY, SYNC_PRIORITY_REGISTRY, SYNC_PRIORITY_AREA, CONF_STATS_UPDATE_INTERVAL,
+    DEFAULT_STATS_UPDATE_INTERVAL
 )
-from .core.helpers import Config, get_child_instances
+from .core.components import sensor
+from .core.helpers import Config, LazySchema, get_child_instances
 from .core.http import YandexSmartHomeUnauthorizedView, YandexSmartHomeView
 from .core.type_mapper import DOMAIN_TO_YANDEX_TYPES
 from .functions.capability import CAPABILITIES, CAPABILITIES_TOGGLE, CAPABILITIES_MODE, CAPABILITIES_RANGE
@@ -41,12 +44,13 @@ if TYPE_CHECKING:
 
 _LOGGER = logging.getLogger(__name__)
 
-PROPERTY_INSTANCE_SCHEMA = vol.In(get_child_instances(PROPERTIES))
-TOGGLE_INSTANCE_SCHEMA = vol.In(get_child_instances(CAPABILITIES, CAPABILITIES_TOGGLE))
-MODE_INSTANCE_SCHEMA = vol.In(get_child_instances(CAPABILITIES, CAPABILITIES_MODE))
-RANGE_INSTANCE_SCHEMA = vol.In(get_child_instances(CAPABILITIES, CAPABILITIES_RANGE))
+# Schemas are built on first validation (see `LazySchema`)
+PROPERTY_INSTANCE_SCHEMA = LazySchema(lambda: vol.In(get_child_instances(PROPERTIES)))
+TOGGLE_INSTANCE_SCHEMA = LazySchema(lambda: vol.In(get_child_instances(CAPABILITIES, CAPABILITIES_TOGGLE)))
+MODE_INSTANCE_SCHEMA = LazySchema(lambda: vol.In(get_child_instances(CAPABILITIES, CAPABILITIES_MODE)))
+RANGE_INSTANCE_SCHEMA = LazySchema(lambda: vol.In(get_child_instances(CAPABILITIES, CAPABILITIES_RANGE)))
 
-ENTITY_PROPERTY_SCHEMA = vol.Any(
+ENTITY_PROPERTY_SCHEMA = LazySchema(lambda: vol.Any(
     vol.All(cv.entity_id, lambda x: {CONF_ENTITY_ID: x}),
     vol.Schema(
         {
@@ -54,7 +58,14 @@ ENTITY_PROPERTY_SCHEMA = vol.Any(
             vol.Optional(CONF_ATTRIBUTE): cv.string,
         }
     )
-)
+))
+
+# Mode instance -> mode capability
+MODE_CAPABILITIES: Dict[str, '_ModeCapability'] = {}
+for _capability in CAPABILITIES:
+    if _capability.type == CAPABILITIES_MODE:
+        MODE_CAPABILITIES.setdefault(_capability.instance, _capability)
+del _capability
 
 
 def check_mode_override_mappings(value: Dict[str, Any]):
@@ -62,28 +73,25 @@ def check_mode_override_mappings(value: Dict[str, Any]):
         if CONF_MAPPING not in config:
             continue
 
-        capability: '_ModeCapability'
-        for capability in CAPABILITIES:
-            _LOGGER.debug('Check on %s with %s' % (capability.instance, instance))
-            if capability.instance == instance:
-                invalid_keys = config[CONF_MAPPING].keys() - set(capability.internal_modes)
-                if invalid_keys:
-                    raise vol.Invalid('Invalid Yandex modes for overrides: %s' % ', '.join(invalid_keys),
-                                      path=[instance, CONF_MAPPING])
-                break
+        capability = MODE_CAPABILITIES.get(instance)
+        if capability is not None:
+            invalid_keys = config[CONF_MAPPING].keys() - set(capability.internal_modes)
+            if invalid_keys:
+                raise vol.Invalid('Invalid Yandex modes for overrides: %s' % ', '.join(invalid_keys),
+                                  path=[instance, CONF_MAPPING])
 
     return value
 
 
 NUMERIC_MODE_VALIDATOR = vol.In(MODES_NUMERIC)
-NUMERIC_MODE_SCHEMA = vol.Any(
+NUMERIC_MODE_SCHEMA = LazySchema(lambda: vol.Any(
     cv.boolean,
     {NUMERIC_MODE_VALIDATOR: cv.string},
     vol.All([NUMERIC_MODE_VALIDATOR], vol.Length(min=2, max=10))
-)
-PROPERTY_OVERRIDES_SCHEMA = vol.All({PROPERTY_INSTANCE_SCHEMA: ENTITY_PROPERTY_SCHEMA})
-TOGGLE_OVERRIDES_SCHEMA = vol.All({TOGGLE_INSTANCE_SCHEMA: cv.entity_id})
-MODE_OVERRIDES_SCHEMA = vol.All(
+))
+PROPERTY_OVERRIDES_SCHEMA = LazySchema(lambda: vol.All({PROPERTY_INSTANCE_SCHEMA: ENTITY_PROPERTY_SCHEMA}))
+TOGGLE_OVERRIDES_SCHEMA = LazySchema(lambda: vol.All({TOGGLE_INSTANCE_SCHEMA: cv.entity_id}))
+MODE_OVERRIDES_SCHEMA = LazySchema(lambda: vol.All(
     {
         MODE_INSTANCE_SCHEMA: vol.Schema({
             vol.Required(CONF_ENTITY_ID): cv.entity_id,
@@ -92,7 +100,7 @@ MODE_OVERRIDES_SCHEMA = vol.All(
         })
     },
     check_mode_override_mappings
-)
+))
 
 
 def check_range_overrides(value: Dict[str, Any]):
@@ -108,7 +116,7 @@ def check_range_overrides(value: Dict[str, Any]):
     return value
 
 
-RANGE_OVERRIDES_SCHEMA = vol.All(
+RANGE_OVERRIDES_SCHEMA = LazySchema(lambda: vol.All(
     {
         RANGE_INSTANCE_SCHEMA: vol.Schema({
             vol.Required(CONF_ENTITY_ID): cv.entity_id,
@@ -120,9 +128,9 @@ RANGE_OVERRIDES_SCHEMA = vol.All(
         })
     },
     check_range_overrides
-)
+))
 
-ENTITY_SCHEMA = vol.Schema(
+ENTITY_SCHEMA = LazySchema(lambda: vol.Schema(
     {
         # Entity options
         vol.Optional(CONF_NAME): cv.string,
@@ -146,7 +154,7 @@ ENTITY_SCHEMA = vol.Schema(
         vol.Optional(CONF_ENTITY_MODES, default={}): MODE_OVERRIDES_SCHEMA,
         vol.Optional(CONF_ENTITY_RANGES, default={}): RANGE_OVERRIDES_SCHEMA,
     }
-)
+))
 
 
 def validate_networks(value: Union[bool, Sequence[str]]) -> Union[bool, List[Union[IPv6Network, IPv4Network]]]:
@@ -160,7 +168,7 @@ def validate_networks(value: Union[bool, Sequence[str]]) -> Union[bool, List[Uni
     converted_networks_ipv6 = []
     for i, network in enumerate(value):
         try:
-            if ':' in value:
+            if ':' in network:
                 converted_networks_ipv6.append(IPv6Network(network))
             else:
                 converted_networks_ipv4.append(IPv4Network(network))
@@ -174,21 +182,41 @@ def validate_networks(value: Union[bool, Sequence[str]]) -> Union[bool, List[Uni
     return [*collapse_addresses(converted_networks_ipv4), *collapse_addresses(converted_networks_ipv6)]
 
 
-YANDEX_SMART_HOME_SCHEMA = vol.Schema(
+RATE_LIMIT_SCHEMA = LazySchema(lambda: vol.Schema({
+    vol.Required(CONF_RATE): vol.All(vol.Coerce(float), vol.Range(min=0, min_included=False)),
+    vol.Optional(CONF_BURST): vol.All(vol.Coerce(int), vol.Range(min=1)),
+}))
+
+SYNC_LIMIT_SCHEMA = LazySchema(lambda: vol.All(
+    vol.Schema({
+        vol.Optional(CONF_MAX_DEVICES): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional(CONF_MAX_BYTES): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional(CONF_PRIORITY, default=SYNC_PRIORITY_REGISTRY): vol.In([SYNC_PRIORITY_REGISTRY, SYNC_PRIORITY_AREA]),
+    }),
+    cv.has_at_least_one_key(CONF_MAX_DEVICES, CONF_MAX_BYTES)
+))
+
+YANDEX_SMART_HOME_SCHEMA = LazySchema(lambda: vol.Schema(
     {
         vol.Optional(CONF_FILTER, default={}): ef.FILTER_SCHEMA,
         vol.Optional(CONF_ENTITY_CONFIG, default={}): {cv.entity_id: ENTITY_SCHEMA},
         vol.Optional(CONF_DIAGNOSTICS_MODE, default=False):
             vol.All(vol.Any(cv.boolean, vol.All(cv.ensure_list, [cv.string])), validate_networks),
+        vol.Optional(CONF_RATE_LIMITS, default={}): {vol.In(RATE_LIMIT_ENDPOINTS): RATE_LIMIT_SCHEMA},
+        vol.Optional(CONF_QUERY_CACHE_TTL, default=0): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+        vol.Optional(CONF_SERIALIZE_IN_EXECUTOR, default=False): cv.boolean,
+        vol.Optional(CONF_SYNC_LIMIT): SYNC_LIMIT_SCHEMA,
+        vol.Optional(CONF_STATS_UPDATE_INTERVAL, default=DEFAULT_STATS_UPDATE_INTERVAL):
+            vol.All(vol.Coerce(float), vol.Range(min=0)),
     }
-)
+))
 
-CONFIG_SCHEMA = vol.Schema(
+CONFIG_SCHEMA = LazySchema(lambda: vol.Schema(
     {
         DOMAIN: YANDEX_SMART_HOME_SCHEMA,
     },
     extra=vol.ALLOW_EXTRA
-)
+))
 
 
 @callback
@@ -283,14 +311,19 @@ async def async_setup_entry(hass: HomeAssistantType, config_entry: ConfigEntry):
     hass.data[DOMAIN] = Config(
         should_expose=yandex_cfg[CONF_FILTER],
         entity_config=yandex_cfg[CONF_ENTITY_CONFIG],
-        diagnostics_mode=diagnostics_mode
+        diagnostics_mode=diagnostics_mode,
+        rate_limits=yandex_cfg.get(CONF_RATE_LIMITS),
+        query_cache_ttl=yandex_cfg.get(CONF_QUERY_CACHE_TTL, 0),
+        serialize_in_executor=yandex_cfg.get(CONF_SERIALIZE_IN_EXECUTOR, False),
+        sync_limit=yandex_cfg.get(CONF_SYNC_LIMIT),
+        stats_update_interval=yandex_cfg.get(CONF_STATS_UPDATE_INTERVAL, DEFAULT_STATS_UPDATE_INTERVAL)
     )
 
     # Create Yandex request statistics sensor
     hass.async_create_task(
         hass.config_entries.async_forward_entry_setup(
             config_entry,
-            SENSOR_DOMAIN
+            sensor.DOMAIN
         )
     )
 
@@ -301,7 +334,7 @@ async def async_unload_entry(hass, config_entry):
     """Unload a config entry."""
     
     # Remove Yandex request statistics sensor
-    await hass.config_entries.async_forward_entry_unload(config_entry, SENSOR_DOMAIN)
+    await hass.config_entries.async_forward_entry_unload(config_entry, sensor.DOMAIN)
 
     # Remove configuration object (and thus disable HTTP request serving)
     hass.data.pop(DOMAIN)
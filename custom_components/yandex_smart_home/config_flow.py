@@ -9,10 +9,6 @@ from typing import Any, Dict, Optional, List, Tuple, Union, Callable, Awaitable
 
 import voluptuous as vol
 from homeassistant import config_entries
-from homeassistant.components import (
-    media_player,
-    script
-)
 from homeassistant.config import YAML_CONFIG_FILE
 from homeassistant.const import ATTR_FRIENDLY_NAME, CONF_ENTITY_ID
 from homeassistant.core import valid_entity_id
@@ -23,6 +19,7 @@ from .const import (
     TYPE_OTHER, CONF_CHANNEL_SET_VIA_MEDIA_CONTENT_ID, CONF_TYPE,
     PREFIX_TYPES, CONF_ENTITY_PROPERTIES, CONF_ENTITY_TOGGLES, CONF_ATTRIBUTE)
 from .core.helpers import get_child_instances, AnyInstanceType
+from .core.components import media_player, script
 from .core.type_mapper import get_supported_types, DOMAIN_TO_YANDEX_TYPES
 from .functions.capability import CAPABILITIES, CAPABILITIES_TOGGLE
 from .functions.prop import PROPERTIES
@@ -25,12 +25,33 @@ CONF_MAPPING = 'mapping'
 CONF_SET_SCRIPT = 'set_script'
 CONF_MULTIPLIER = 'multiplier'
 CONF_PRECISION = 'precision'
+CONF_RATE_LIMITS = 'rate_limits'
+CONF_RATE = 'rate'
+CONF_BURST = 'burst'
+CONF_QUERY_CACHE_TTL = 'query_cache_ttl'
+CONF_SERIALIZE_IN_EXECUTOR = 'serialize_in_executor'
+CONF_SYNC_LIMIT = 'sync_limit'
+CONF_MAX_DEVICES = 'max_devices'
+CONF_MAX_BYTES = 'max_bytes'
+CONF_PRIORITY = 'priority'
+CONF_STATS_UPDATE_INTERVAL = 'stats_update_interval'
+
+# Device priorities for truncated devices responses
+SYNC_PRIORITY_REGISTRY = 'registry'
+SYNC_PRIORITY_AREA = 'area'
 
 # Attributes for Yandex statistics sensor
 ATTR_LAST_ACTION_TIME = "last_command_time"
 ATTR_LAST_ACTION_TARGETS = "last_command_targets"
 ATTR_LAST_SYNC_TIME = "last_sync_time"
 ATTR_SYNCED_DEVICES_COUNT = "synced_devices_count"
+ATTR_RATE_LIMITED_COUNT = "rate_limited_requests_count"
+ATTR_QUERY_CACHE_HITS = "query_cache_hits"
+ATTR_QUERY_CACHE_MISSES = "query_cache_misses"
+ATTR_SYNC_TRUNCATED_COUNT = "sync_truncated_devices_count"
+ATTR_REQUESTS_COUNT = "requests_count"
+ATTR_ERRORS_COUNT = "errors_count"
+ATTR_DEVICES_COUNT = "devices_count"
 
 # Additional attributes accessed within code
 ATTR_MODEL = "model"
@@ -95,6 +116,20 @@ ERR_INVALID_ACTION = 'INVALID_ACTION'
 ERR_INVALID_VALUE = 'INVALID_VALUE'
 ERR_NOT_SUPPORTED_IN_CURRENT_MODE = 'NOT_SUPPORTED_IN_CURRENT_MODE'
 
+# Endpoints which may be rate limited (config key -> request path)
+RATE_LIMIT_ENDPOINTS = {
+    'devices': '/user/devices',
+    'query': '/user/devices/query',
+    'action': '/user/devices/action',
+    'unlink': '/user/unlink',
+}
+
+# Time (in seconds) to keep responses for deduplication of repeated requests
+REQUEST_CACHE_TTL = 30
+
+# Default minimum time (in seconds) between statistics sensor state updates
+DEFAULT_STATS_UPDATE_INTERVAL = 10
+
 # Event types
 EVENT_ACTION_RECEIVED = 'yandex_smart_home_action'
 EVENT_QUERY_RECEIVED = 'yandex_smart_home_query'
@@ -0,0 +1,47 @@
+"""Lazily imported Home Assistant components"""
+from importlib import import_module
+from typing import Any
+
+
+class LazyComponent:
+    """Home Assistant component package, imported on first attribute access.
+
+    Component packages are named after their domains, so `DOMAIN` is
+    available without importing the component at all.
+    """
+
+    def __init__(self, domain: str):
+        self.DOMAIN = domain
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        module = import_module('homeassistant.components.' + self.DOMAIN)
+        value = getattr(module, name)
+        # cache value on the proxy, so further lookups do not reach this method
+        setattr(self, name, value)
+        return value
+
+    def __repr__(self):
+        return '<LazyComponent %s>' % self.DOMAIN
+
+
+air_quality = LazyComponent('air_quality')
+automation = LazyComponent('automation')
+binary_sensor = LazyComponent('binary_sensor')
+camera = LazyComponent('camera')
+climate = LazyComponent('climate')
+cover = LazyComponent('cover')
+fan = LazyComponent('fan')
+group = LazyComponent('group')
+input_boolean = LazyComponent('input_boolean')
+light = LazyComponent('light')
+lock = LazyComponent('lock')
+media_player = LazyComponent('media_player')
+scene = LazyComponent('scene')
+script = LazyComponent('script')
+sensor = LazyComponent('sensor')
+switch = LazyComponent('switch')
+vacuum = LazyComponent('vacuum')
+water_heater = LazyComponent('water_heater')
@@ -0,0 +1,150 @@
+"""Entity configuration compiled for runtime lookups"""
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple, Union
+
+from homeassistant.const import CONF_ENTITY_ID, CONF_MAXIMUM, CONF_MINIMUM, CONF_NAME
+
+from ..const import (
+    CONF_ROOM, CONF_TYPE, CONF_ATTRIBUTE,
+    CONF_CHANNEL_SET_VIA_MEDIA_CONTENT_ID, CONF_RELATIVE_VOLUME_ONLY,
+    CONF_SCRIPT_CHANNEL_UP, CONF_SCRIPT_CHANNEL_DOWN,
+    CONF_INPUT_SOURCES, CONF_PROGRAMS,
+    CONF_ENTITY_PROPERTIES, CONF_ENTITY_TOGGLES, CONF_ENTITY_MODES, CONF_ENTITY_RANGES,
+    CONF_MAPPING, CONF_SET_SCRIPT, CONF_PRECISION, CONF_MULTIPLIER,
+)
+
+# Lookup tables are plain dicts: mappingproxy lookups are noticeably slower
+# on the hot paths. They are shared and must be treated as read-only.
+_EMPTY_MAPPING: Dict[str, Any] = {}
+
+
+class PropertyOverrideConfig:
+    """Property value source."""
+
+    __slots__ = ('entity_id', 'attribute')
+
+    def __init__(self, config: Mapping[str, Any]):
+        self.entity_id: Optional[str] = config.get(CONF_ENTITY_ID)
+        self.attribute: Optional[str] = config.get(CONF_ATTRIBUTE)
+
+
+class ModeOverrideConfig:
+    """Mode capability override."""
+
+    __slots__ = ('entity_id', 'set_script', 'mapping', 'state_modes')
+
+    def __init__(self, config: Mapping[str, Any]):
+        self.entity_id: str = config[CONF_ENTITY_ID]
+        self.set_script: List[Dict[str, Any]] = config[CONF_SET_SCRIPT]
+
+        # Yandex mode -> entity states
+        self.mapping: Optional[Mapping[str, Tuple[str, ...]]] = None
+        # Entity state -> Yandex mode (first matching mode wins)
+        self.state_modes: Mapping[str, str] = _EMPTY_MAPPING
+
+        mapping = config.get(CONF_MAPPING)
+        if mapping is not None:
+            self.mapping = {
+                yandex_mode: tuple(states)
+                for yandex_mode, states in mapping.items()
+            }
+
+            state_modes = {}
+            for yandex_mode, states in self.mapping.items():
+                for entity_state in states:
+                    state_modes.setdefault(entity_state, yandex_mode)
+            self.state_modes = state_modes
+
+
+class RangeOverrideConfig:
+    """Range capability override."""
+
+    __slots__ = ('entity_id', 'set_script', 'minimum', 'maximum', 'precision', 'multiplier')
+
+    def __init__(self, config: Mapping[str, Any]):
+        self.entity_id: str = config[CONF_ENTITY_ID]
+        self.set_script: List[Dict[str, Any]] = config[CONF_SET_SCRIPT]
+        self.minimum: Union[int, float] = config[CONF_MINIMUM]
+        self.maximum: Union[int, float] = config[CONF_MAXIMUM]
+        self.precision: Union[int, float] = config[CONF_PRECISION]
+        self.multiplier: float = config[CONF_MULTIPLIER]
+
+
+class EntityConfig(Mapping):
+    """Validated entity configuration, compiled once for runtime lookups.
+
+    Options are available as attributes, with overrides resolved into typed
+    objects. The object is also a read-only mapping of the validated options.
+    """
+
+    __slots__ = ('_config', 'name', 'room', 'type',
+                 'channel_set_via_media_content_id', 'relative_volume_only',
+                 'script_channel_up', 'script_channel_down',
+                 'custom_modes', 'properties', 'toggles', 'modes', 'ranges')
+
+    def __init__(self, config: Mapping[str, Any]):
+        self._config = MappingProxyType(dict(config))
+
+        self.name: Optional[str] = config.get(CONF_NAME)
+        self.room: Optional[str] = config.get(CONF_ROOM)
+        self.type: Optional[str] = config.get(CONF_TYPE)
+
+        self.channel_set_via_media_content_id: Optional[bool] = config.get(CONF_CHANNEL_SET_VIA_MEDIA_CONTENT_ID)
+        self.relative_volume_only: Optional[bool] = config.get(CONF_RELATIVE_VOLUME_ONLY)
+        self.script_channel_up: Optional[List[Dict[str, Any]]] = config.get(CONF_SCRIPT_CHANNEL_UP)
+        self.script_channel_down: Optional[List[Dict[str, Any]]] = config.get(CONF_SCRIPT_CHANNEL_DOWN)
+
+        # Custom modes key -> modes mapping (HA => Yandex)
+        self.custom_modes: Mapping[str, Mapping[str, str]] = {
+            key: {ha_mode: yandex_mode for yandex_mode, ha_mode in config[key].items()}
+            for key in (CONF_INPUT_SOURCES, CONF_PROGRAMS)
+            if isinstance(config.get(key), Mapping)
+        }
+
+        # Instance -> override
+        self.properties: Mapping[str, PropertyOverrideConfig] = self._compile_overrides(
+            config, CONF_ENTITY_PROPERTIES, PropertyOverrideConfig)
+        self.toggles: Mapping[str, str] = self._compile_overrides(config, CONF_ENTITY_TOGGLES, str)
+        self.modes: Mapping[str, ModeOverrideConfig] = self._compile_overrides(
+            config, CONF_ENTITY_MODES, ModeOverrideConfig)
+        self.ranges: Mapping[str, RangeOverrideConfig] = self._compile_overrides(
+            config, CONF_ENTITY_RANGES, RangeOverrideConfig)
+
+    @staticmethod
+    def _compile_overrides(config: Mapping[str, Any], key: str, factory) -> Mapping[str, Any]:
+        overrides = config.get(key)
+        if not overrides:
+            return _EMPTY_MAPPING
+
+        return {
+            instance: factory(override_config)
+            for instance, override_config in overrides.items()
+            if override_config
+        }
+
+    def __getitem__(self, key: str) -> Any:
+        return self._config[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._config)
+
+    def __len__(self) -> int:
+        return len(self._config)
+
+    def __repr__(self):
+        return '<EntityConfig %r>' % (dict(self._config),)
+
+
+EMPTY_ENTITY_CONFIG = EntityConfig({})
+
+
+def compile_entity_config(entity_config: Mapping[str, Mapping[str, Any]]) -> Dict[str, EntityConfig]:
+    """
+    Compile validated entity configurations.
+    :param entity_config: Entity config (entity ID -> entity options)
+    :return: Entity ID -> compiled entity config
+    """
+    return {
+        entity_id: config if isinstance(config, EntityConfig) else EntityConfig(config)
+        for entity_id, config in entity_config.items()
+    }
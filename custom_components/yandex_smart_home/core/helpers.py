@@ -1,32 +1,46 @@
 """Helper classes for Yandex Smart Home integration."""
 import ipaddress
 import logging
-from asyncio import gather
+import re
+import time
+from asyncio import gather, ensure_future, shield, Future
+from collections import OrderedDict
 from collections.abc import Mapping
-from typing import TYPE_CHECKING, Type, List, Optional, Union
+from threading import Lock
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple, Union
+from uuid import uuid4
 
 from homeassistant.const import (
-    CONF_NAME, STATE_UNAVAILABLE, ATTR_SUPPORTED_FEATURES
+    STATE_UNAVAILABLE, ATTR_SUPPORTED_FEATURES
 )
 from homeassistant.core import Context, callback, State
+from homeassistant.helpers.json import JSONEncoder
 from homeassistant.helpers.typing import HomeAssistantType
 
 from ..const import (
     ERR_NOT_SUPPORTED_IN_CURRENT_MODE, ERR_DEVICE_UNREACHABLE,
-    ERR_INVALID_VALUE, CONF_ROOM, CONF_TYPE
+    ERR_INVALID_VALUE, ERR_INTERNAL_ERROR,
+    CONF_RATE, CONF_BURST, RATE_LIMIT_ENDPOINTS, REQUEST_CACHE_TTL
 )
+from ..core.entity_config import EMPTY_ENTITY_CONFIG, EntityConfig, compile_entity_config
 from ..core.error import SmartHomeError
 from ..core.type_mapper import determine_state_type
 from ..functions import prop, capability
 
 if TYPE_CHECKING:
-    from homeassistant.helpers.device_registry import DeviceEntry
+    from homeassistant.helpers.area_registry import AreaRegistry
+    from homeassistant.helpers.device_registry import DeviceEntry, DeviceRegistry
+    from homeassistant.helpers.entity_registry import EntityRegistry
 
 _LOGGER = logging.getLogger(__name__)
 
+# Device information reported in devices responses (from entity attributes or device registry)
+DEVICE_INFO_ATTRIBUTES = ('manufacturer', 'model', 'sw_version', 'hw_version')
+
 CapabilityType = 'capability._Capability'
 PropertyType = 'prop._Property'
-AnyInstanceType = Union[Type[PropertyType], Type[CapabilityType]]
+AnyInstanceType = Union[PropertyType, CapabilityType]
 
 
 def deep_update(target, source):
@@ -56,83 +70,726 @@ def get_child_instances(source: List[AnyInstanceType], _type: Optional[str] = No
     ]
 
 
+class LazySchema:
+    """Validation schema built on first use.
+
+    Attributes and string representation (which Home Assistant inspects when
+    merging packages) are taken from the built schema.
+    """
+
+    def __init__(self, factory: Callable[[], Callable[[Any], Any]]):
+        """
+        Initialize lazy schema.
+        :param factory: Callable building the schema
+        """
+        self._factory = factory
+        self._schema = None
+
+    def build(self) -> Callable[[Any], Any]:
+        """Return (built on first call) schema."""
+        schema = self._schema
+        if schema is None:
+            schema = self._schema = self._factory()
+        return schema
+
+    def __call__(self, value: Any) -> Any:
+        schema = self._schema
+        if schema is None:
+            schema = self.build()
+        return schema(value)
+
+    def __voluptuous_compile__(self, schema):
+        # compile built schema into enclosing one, as if it was used there directly
+        return schema._compile(self.build())
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.build(), name)
+
+    def __str__(self):
+        return str(self.build())
+
+    def __repr__(self):
+        return '<LazySchema %r>' % (self._schema or self._factory)
+
+
+class NetworkMatcher:
+    """Match IP addresses against networks using binary prefix tries.
+
+    One trie is built per IP version, with trie nodes being lists of
+    [zero-bit child, one-bit child, network ends here]. Results for recently
+    seen addresses are kept in a small LRU cache.
+    """
+
+    __slots__ = ('_tries', '_cache', '_cache_size')
+
+    def __init__(self, networks: Iterable[Union[ipaddress.IPv4Network, ipaddress.IPv6Network]],
+                 cache_size: int = 256):
+        """Compile networks into prefix tries."""
+        self._tries = {4: [None, None, False], 6: [None, None, False]}
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+
+        for network in networks:
+            node = self._tries[network.version]
+            address = int(network.network_address)
+            max_prefixlen = network.max_prefixlen
+
+            for position in range(network.prefixlen):
+                if node[2]:
+                    # Covered by a shorter network already
+                    break
+
+                bit = (address >> (max_prefixlen - 1 - position)) & 1
+                if node[bit] is None:
+                    node[bit] = [None, None, False]
+                node = node[bit]
+
+            else:
+                node[2] = True
+                node[0] = node[1] = None
+
+    def _match_address(self, remote: str) -> bool:
+        try:
+            address = ipaddress.ip_address(remote)
+        except ValueError:
+            return False
+
+        node = self._tries[address.version]
+        value = int(address)
+        position = address.max_prefixlen - 1
+
+        while node is not None:
+            if node[2]:
+                return True
+            if position < 0:
+                break
+            node = node[(value >> position) & 1]
+            position -= 1
+
+        return False
+
+    def match(self, remote: Optional[str]) -> bool:
+        """Check whether remote address belongs to any of the networks."""
+        if not remote:
+            return False
+
+        cache = self._cache
+        result = cache.get(remote)
+        if result is not None:
+            cache.move_to_end(remote)
+            return result
+
+        result = self._match_address(remote)
+        cache[remote] = result
+        if len(cache) > self._cache_size:
+            cache.popitem(last=False)
+
+        return result
+
+
+class TokenBucket:
+    """Token bucket refilled at a constant rate."""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate: float, capacity: float):
+        """Initialize a full bucket."""
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def consume(self) -> bool:
+        """Take a token from the bucket, return False if there is none."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens < 1:
+            return False
+
+        self.tokens -= 1
+        return True
+
+
+class RateLimiter:
+    """Limit request rates per user and endpoint."""
+
+    __slots__ = ('_limits', '_buckets')
+
+    def __init__(self, rate_limits: Optional[Dict[str, Dict]] = None):
+        """
+        Initialize rate limiter.
+        :param rate_limits: Endpoint key (see `RATE_LIMIT_ENDPOINTS`) -> rate limit config
+        """
+        self._limits = {
+            RATE_LIMIT_ENDPOINTS[endpoint]: (limit[CONF_RATE], limit.get(CONF_BURST) or max(1.0, limit[CONF_RATE]))
+            for endpoint, limit in (rate_limits or {}).items()
+        }
+        self._buckets: Dict[tuple, TokenBucket] = {}
+
+    def consume(self, user_id, action: str) -> bool:
+        """Check whether request of the user to given action fits within rate limit."""
+        limit = self._limits.get(action)
+        if limit is None:
+            return True
+
+        key = (user_id, action)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(*limit)
+
+        return bucket.consume()
+
+
+class RequestCache:
+    """Short-lived cache of in-flight and completed request results.
+
+    Repeated requests (e.g. upstream retries with the same request ID) join
+    the running task or receive the cached result instead of being
+    processed again. Failed requests are forgotten as soon as they finish,
+    so that retries are processed anew.
+    """
+
+    __slots__ = ('_ttl', '_is_cacheable', '_entries')
+
+    def __init__(self, ttl: float, is_cacheable: Optional[Callable[[Any], bool]] = None):
+        """
+        Initialize request cache.
+        :param ttl: Time (in seconds) to keep results since request start
+        :param is_cacheable: Check whether result may be reused (all results are reused if None)
+        """
+        self._ttl = ttl
+        self._is_cacheable = is_cacheable
+        self._entries: Dict[Hashable, Tuple[float, Future]] = {}
+
+    def _expire(self, now: float) -> None:
+        entries = self._entries
+        # Entries are added in chronological order, so expired ones are at the front
+        while entries:
+            key = next(iter(entries))
+            if entries[key][0] > now:
+                break
+            del entries[key]
+
+    def _discard_failed(self, key: Hashable, future: Future) -> None:
+        if future.cancelled() or future.exception() is not None or \
+                (self._is_cacheable is not None and not self._is_cacheable(future.result())):
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is future:
+                del self._entries[key]
+
+    async def async_get_or_run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Return result for request key, running the factory only for unseen keys."""
+        now = time.monotonic()
+        self._expire(now)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            _LOGGER.debug("Reusing result of repeated request %s", key)
+            return await shield(entry[1])
+
+        future = ensure_future(factory())
+        self._entries[key] = (now + self._ttl, future)
+        future.add_done_callback(lambda f: self._discard_failed(key, f))
+
+        # Shielded so that a dropped connection does not cancel a request
+        # which may be joined by a retry
+        return await shield(future)
+
+
+def is_successful_response(response: Optional[Dict[str, Any]]) -> bool:
+    """Check whether API response carries no error code."""
+    payload = response.get('payload') if response else None
+    return not payload or 'error_code' not in payload
+
+
+class ResponseCache:
+    """Cache of serialized responses which are valid for a short time."""
+
+    __slots__ = ('ttl', 'hits', 'misses', '_entries')
+
+    def __init__(self, ttl: float):
+        """
+        Initialize response cache.
+        :param ttl: Time (in seconds) to keep responses
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return cached response for given key."""
+        now = time.monotonic()
+        entries = self._entries
+
+        # Entries share TTL and thus are stored in order of expiration
+        while entries:
+            expired_key = next(iter(entries))
+            if entries[expired_key][0] > now:
+                break
+            del entries[expired_key]
+
+        entry = entries.get(key)
+        if entry is None or entry[0] <= now:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, response: Any) -> None:
+        """Store response for given key."""
+        entries = self._entries
+        # Re-insert refreshed entries, so that entries remain in order of expiration
+        entries.pop(key, None)
+        entries[key] = (time.monotonic() + self.ttl, response)
+
+
+class JSONFragment:
+    """Value along with its pre-encoded JSON representation.
+
+    Fragments are embedded verbatim by `encode_json`, so values that rarely
+    change are encoded once instead of on every response.
+    """
+
+    __slots__ = ('value', 'encoded')
+
+    def __init__(self, value: Any, encoded: Optional[str] = None):
+        """
+        Initialize JSON fragment.
+        :param value: Value
+        :param encoded: JSON representation of value (encoded from value if None)
+        """
+        self.value = value
+        self.encoded = encode_json(value) if encoded is None else encoded
+
+    def __repr__(self) -> str:
+        return repr(self.value)
+
+
+class _FragmentJSONEncoder(JSONEncoder):
+    """JSON encoder which encodes fragments as unique string markers.
+
+    Markers are then replaced with fragment contents. They are randomized,
+    so that they can not be mistaken for actual values.
+    """
+
+    marker_id = uuid4().hex
+    marker_pattern = re.compile(r'"\\u0000' + marker_id + r':(\d+)\\u0000"')
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.fragments: List[str] = []
+
+    def default(self, o: Any) -> Any:
+        if isinstance(o, JSONFragment):
+            self.fragments.append(o.encoded)
+            return '\x00%s:%d\x00' % (self.marker_id, len(self.fragments) - 1)
+        return super().default(o)
+
+
+def encode_json(value: Any) -> str:
+    """Encode value into JSON (the same way Home Assistant views do), embedding fragments."""
+    encoder = _FragmentJSONEncoder(sort_keys=True, allow_nan=False)
+    encoded = encoder.encode(value)
+    if not encoder.fragments:
+        return encoded
+
+    fragments = encoder.fragments
+    return encoder.marker_pattern.sub(lambda match: fragments[int(match.group(1))], encoded)
+
+
+class InternTable:
+    """Table of canonical instances for equal JSON-like values.
+
+    Interned values are shared between responses, so they must not be
+    modified after interning. Only a limited number of recently interned
+    values is kept, so that values of removed entities or outdated
+    attributes do not accumulate; evicted values stay valid where used.
+    Descriptions are also interned from executor threads (see
+    `serialize_in_executor` option), so interning is locked.
+    """
+
+    __slots__ = ('_values', '_maxsize', '_lock')
+
+    def __init__(self, maxsize: int = 4096):
+        """
+        Initialize the intern table.
+        :param maxsize: Maximum number of values to keep
+        """
+        self._values: Dict[str, Any] = OrderedDict()
+        self._maxsize = maxsize
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def intern(self, value: Any) -> Tuple[str, Any]:
+        """
+        Return key and canonical instance of value.
+
+        Representation serves as the key: it is cheap to compute and, unlike
+        Python equality, tells apart e.g. `1` and `True`. Equal values built
+        in a different key order are merely not shared.
+
+        :param value: Value to intern
+        :return: (key, canonical instance)
+        """
+        key = repr(value)
+
+        with self._lock:
+            values = self._values
+            canonical = values.get(key)
+
+            if canonical is None:
+                canonical = values[key] = value
+                if len(values) > self._maxsize:
+                    values.popitem(last=False)
+            else:
+                values.move_to_end(key)
+
+        return key, canonical
+
+
+def build_override_index(entity_config: Dict[str, EntityConfig], should_expose=None) -> Dict[str, Set[str]]:
+    """
+    Build reverse index of override sources from compiled entity config.
+    :param entity_config: Entity config (entity ID -> compiled entity options)
+    :param should_expose: Optional filter of exposed entity IDs
+    :return: Source entity ID -> dependent (exposed) entity IDs
+    """
+    index: Dict[str, Set[str]] = {}
+
+    for entity_id, config in entity_config.items():
+        if should_expose is not None and not should_expose(entity_id):
+            continue
+
+        sources = set(config.toggles.values())
+
+        for overrides in (config.properties, config.modes, config.ranges):
+            for override_config in overrides.values():
+                if override_config.entity_id:
+                    sources.add(override_config.entity_id)
+
+        sources.discard(entity_id)
+
+        for source_entity_id in sources:
+            index.setdefault(source_entity_id, set()).add(entity_id)
+
+    return index
+
+
+def get_states_snapshot(hass: HomeAssistantType, config: 'Config',
+                        entity_ids: Iterable[str]) -> Mapping:
+    """
+    Fetch states of entities and their override sources in one pass.
+    :param hass: HomeAssistant object
+    :param config: Configuration
+    :param entity_ids: Entity IDs to fetch states for
+    :return: Read-only entity ID -> state mapping (missing entities are omitted)
+    """
+    get_state = hass.states.get
+    override_sources = config.override_sources
+    required_entity_ids = set(entity_ids)
+
+    for entity_id in required_entity_ids.intersection(override_sources):
+        required_entity_ids.update(override_sources[entity_id])
+
+    snapshot = {}
+    for entity_id in required_entity_ids:
+        state = get_state(entity_id)
+        if state is not None:
+            snapshot[entity_id] = state
+
+    return MappingProxyType(snapshot)
+
+
+async def async_get_registries(hass: HomeAssistantType) -> Tuple['DeviceRegistry', 'EntityRegistry', 'AreaRegistry']:
+    """Load device, entity and area registries required to serialize devices."""
+    return await gather(
+        hass.helpers.device_registry.async_get_registry(),
+        hass.helpers.entity_registry.async_get_registry(),
+        hass.helpers.area_registry.async_get_registry(),
+    )
+
+
+class RegistrySnapshot:
+    """Plain data taken from device, entity and area registries.
+
+    Registries may only be read within the event loop, so devices responses
+    (which may be serialized in an executor thread) read this snapshot.
+    """
+
+    __slots__ = ('order', 'areas', 'device_info')
+
+    def __init__(self, dev_reg: 'DeviceRegistry', ent_reg: 'EntityRegistry', area_reg: 'AreaRegistry'):
+        """Take snapshot of registries (within the event loop)."""
+        # Entity ID -> position in entity registry
+        self.order: Dict[str, int] = {}
+        # Entity ID -> name of device area
+        self.areas: Dict[str, str] = {}
+        # Entity ID -> device info (shared between entities of a device)
+        self.device_info: Dict[str, Dict[str, str]] = {}
+
+        device_infos: Dict[str, Dict[str, str]] = {}
+        for index, (entity_id, entity_entry) in enumerate(ent_reg.entities.items()):
+            self.order[entity_id] = index
+
+            device_entry = entity_entry.device_id and dev_reg.devices.get(entity_entry.device_id)  # type: DeviceEntry
+            if not device_entry:
+                continue
+
+            device_info = device_infos.get(device_entry.id)
+            if device_info is None:
+                device_info = device_infos[device_entry.id] = {}
+                for attr in DEVICE_INFO_ATTRIBUTES:
+                    value = getattr(device_entry, attr, None)
+                    if value:
+                        device_info[attr] = value
+            self.device_info[entity_id] = device_info
+
+            area_entry = device_entry.area_id and area_reg.areas.get(device_entry.area_id)
+            if area_entry and area_entry.name:
+                self.areas[entity_id] = area_entry.name
+
+
 class Config:
     """Hold the configuration for Yandex Smart Home."""
 
     def __init__(self, should_expose, entity_config=None,
-                 diagnostics_mode: Union[bool, ipaddress.IPv4Network, ipaddress.IPv6Network] = False):
+                 diagnostics_mode: Union[bool, ipaddress.IPv4Network, ipaddress.IPv6Network] = False,
+                 rate_limits: Optional[Dict[str, Dict]] = None,
+                 query_cache_ttl: float = 0,
+                 serialize_in_executor: bool = False,
+                 sync_limit: Optional[Dict[str, Any]] = None,
+                 stats_update_interval: float = 0):
         """Initialize the configuration."""
         self.should_expose = should_expose
-        self.entity_config = entity_config or {}
+        self.entity_config = compile_entity_config(entity_config or {})
         self.sensor_status = None
         self.diagnostics_mode = diagnostics_mode
+        self.diagnostics_networks = NetworkMatcher(diagnostics_mode or ())
+        self.rate_limiter = RateLimiter(rate_limits)
+        self.request_cache = RequestCache(REQUEST_CACHE_TTL, is_successful_response)
+        self.query_cache = ResponseCache(query_cache_ttl) if query_cache_ttl else None
+        self.serialize_in_executor = serialize_in_executor
+        self.descriptions = InternTable()
+        self.sync_limit = sync_limit or None
+        self.stats_update_interval = stats_update_interval
+        self.override_dependents = build_override_index(self.entity_config, should_expose)
+        self.override_sources: Dict[str, Set[str]] = {}
+        for source_entity_id, entity_ids in self.override_dependents.items():
+            for entity_id in entity_ids:
+                self.override_sources.setdefault(entity_id, set()).add(source_entity_id)
+        self._entity_plans: Dict[str, 'EntityPlan'] = {}
+        # Plans are also requested from executor threads (see `serialize_in_executor` option)
+        self._entity_plans_lock = Lock()
+
+    def get_entity_plan(self, state: State) -> 'EntityPlan':
+        """Return (cached) entity plan for given state.
+
+        Plans are rebuilt when entity attributes change, pruned for removed
+        entities on devices requests, and dropped altogether with the
+        configuration object on reload. Safe to call from executor threads.
+        """
+        attributes = state.attributes
+
+        with self._entity_plans_lock:
+            plan = self._entity_plans.get(state.entity_id)
+            if plan is not None and (plan.attributes is attributes or plan.attributes == attributes):
+                plan.attributes = attributes
+                return plan
+
+        # Plans are built outside the lock; a plan built concurrently for
+        # the same attributes is equivalent, so either one may be kept
+        plan = EntityPlan(state, self.entity_config.get(state.entity_id, EMPTY_ENTITY_CONFIG))
+
+        with self._entity_plans_lock:
+            self._entity_plans[state.entity_id] = plan
+
+        return plan
+
+    def prune_entity_plans(self, entity_ids: Iterable[str]) -> None:
+        """Drop plans of entities which are no longer present."""
+        with self._entity_plans_lock:
+            self._entity_plans = {
+                entity_id: plan
+                for entity_id, plan in self._entity_plans.items()
+                if entity_id in entity_ids
+            }
+
+
+class EntityPlan:
+    """Capabilities and properties supported by an entity.
+
+    Descriptions and device type are resolved on first use. When that
+    happens concurrently in several threads, results are equal, so any of
+    them may be kept.
+    """
+
+    __slots__ = ('attributes', 'capabilities', 'properties', 'descriptions', 'device_type')
+
+    def __init__(self, state: State, entity_config: EntityConfig):
+        """Resolve supported capabilities and properties for entity state."""
+        self.attributes = state.attributes
+        self.capabilities: List[CapabilityType] = [
+            cpb.bind(state, entity_config)
+            for cpb in self._generate_support_list(capability.CAPABILITIES, state, entity_config)
+        ]
+        self.properties: List[Union[PropertyType, 'prop.PropertyOverride']] = [
+            ppt.bind(entity_config)
+            for ppt in self._generate_support_list(prop.PROPERTIES, state, entity_config)
+        ]
+        self.descriptions: Optional[Tuple[JSONFragment, JSONFragment]] = None
+        self.device_type: Optional[str] = None
+
+    def get_device_type(self, hass: HomeAssistantType, state: State, entity_config: EntityConfig) -> str:
+        """Return Yandex device type (resolved once per plan)."""
+        if self.device_type is None:
+            self.device_type = determine_state_type(hass, state, entity_config)
+
+        return self.device_type
+
+    def get_descriptions(self, states: Mapping, state: State, entity_config: EntityConfig,
+                         intern_table: InternTable) -> Tuple[JSONFragment, JSONFragment]:
+        """Return unique capability and property descriptions (computed and encoded once per plan).
+
+        Descriptions depend only on entity attributes and config, which the
+        plan is bound to. Equal descriptions are shared via intern table.
+        """
+        if self.descriptions is None:
+            self.descriptions = (
+                JSONFragment(self._describe(self.capabilities, states, state, entity_config, intern_table)),
+                JSONFragment(self._describe(self.properties, states, state, entity_config, intern_table)),
+            )
+
+        return self.descriptions
+
+    @staticmethod
+    def _describe(instances: List[AnyInstanceType], states: Mapping, state: State, entity_config: EntityConfig,
+                  intern_table: InternTable) -> List[Dict]:
+        descriptions = []
+        seen = set()
+        for instance in instances:
+            key, description = intern_table.intern(instance.description(states, state, entity_config))
+            if key not in seen:
+                seen.add(key)
+                descriptions.append(description)
+
+        return descriptions
+
+    @staticmethod
+    def _generate_support_list(from_range: List[AnyInstanceType], state: State, entity_config: EntityConfig):
+        domain = state.domain
+        attributes = state.attributes
+        features = attributes.get(ATTR_SUPPORTED_FEATURES, 0)
+
+        return [
+            instance
+            for instance in from_range
+            if instance.supported(domain, features, entity_config, attributes)
+               or instance.has_override(domain, entity_config, attributes)
+        ]
 
 
 class RequestData:
-    """Hold data associated with a particular request."""
+    """Hold data associated with a particular request.
+
+    Also serves as a request-scoped cache, so that entity configuration,
+    plans and registries snapshot are looked up at most once per request.
+    """
+
+    __slots__ = ('config', 'user_id', 'request_id', 'states',
+                 '_context', '_entity_plans', '_registry')
 
-    def __init__(self, config, user_id, request_id):
+    def __init__(self, config: Config, user_id, request_id):
         """Initialize the request data."""
         self.config = config
+        self.user_id = user_id
         self.request_id = request_id
-        self.context = Context(user_id=user_id)
+        # Request-scoped states snapshot (state machine is used when not set)
+        self.states: Optional[Mapping] = None
+        self._context: Optional[Context] = None
+        self._entity_plans: Dict[str, EntityPlan] = {}
+        self._registry: Optional[RegistrySnapshot] = None
+
+    @property
+    def context(self) -> Context:
+        """Return context for service calls (created on first use)."""
+        if self._context is None:
+            self._context = Context(user_id=self.user_id)
+
+        return self._context
+
+    def get_entity_config(self, entity_id: str) -> EntityConfig:
+        """Return configuration for entity."""
+        return self.config.entity_config.get(entity_id, EMPTY_ENTITY_CONFIG)
+
+    def get_entity_plan(self, state: State) -> EntityPlan:
+        """Return entity plan for given state."""
+        plan = self._entity_plans.get(state.entity_id)
+        if plan is None or plan.attributes is not state.attributes:
+            plan = self._entity_plans[state.entity_id] = self.config.get_entity_plan(state)
+
+        return plan
+
+    async def async_get_registry(self, hass: HomeAssistantType) -> RegistrySnapshot:
+        """Return snapshot of device, entity and area registries."""
+        if self._registry is None:
+            self._registry = RegistrySnapshot(*await async_get_registries(hass))
+
+        return self._registry
 
 
 class YandexEntity:
     """Adaptation of Entity expressed in Yandex's terms."""
 
-    def __init__(self, hass: HomeAssistantType, config: Config, state: State):
-        """Initialize a Yandex Smart Home entity."""
+    __slots__ = ('hass', 'data', 'config', 'state', 'states', 'entity_config', '_plan')
+
+    def __init__(self, hass: HomeAssistantType, data: RequestData, state: State):
+        """
+        Initialize a Yandex Smart Home entity.
+        :param hass: HomeAssistant object
+        :param data: Request data (override sources are read from its states snapshot, when set)
+        :param state: Entity state
+        """
         self.hass = hass
-        self.config = config
+        self.data = data
+        self.config = data.config
         self.state = state
-        self._capabilities: Optional[List[CapabilityType]] = None
-        self._properties: Optional[List[PropertyType]] = None
+        self.states = hass.states if data.states is None else data.states
+        self.entity_config = data.get_entity_config(state.entity_id)
+        self._plan: Optional[EntityPlan] = None
 
     @property
     def entity_id(self):
         """Return entity ID."""
         return self.state.entity_id
 
-    @callback
-    def _generate_support_list(self, from_range: List[AnyInstanceType]):
-        state = self.state
-        domain = state.domain
-        features = state.attributes.get(ATTR_SUPPORTED_FEATURES, 0)
-        entity_config = self.config.entity_config.get(state.entity_id, {})
-        attributes = state.attributes
+    def plan(self) -> EntityPlan:
+        """Return entity plan."""
+        if self._plan is None:
+            self._plan = self.data.get_entity_plan(self.state)
 
-        return [
-            from_class(self.hass, state, entity_config)
-            for from_class in from_range
-            if from_class.supported(domain, features, entity_config, attributes)
-               or from_class.has_override(domain, entity_config, attributes)
-        ]
+        return self._plan
 
-    @callback
     def capabilities(self):
         """Return capabilities for entity."""
-        if self._capabilities is not None:
-            return self._capabilities
-
-        self._capabilities = self._generate_support_list(capability.CAPABILITIES)
+        return self.plan().capabilities
 
-        return self._capabilities
-
-    @callback
     def properties(self):
         """Return properties for entity."""
-        if self._properties is not None:
-            return self._properties
+        return self.plan().properties
 
-        self._properties = self._generate_support_list(prop.PROPERTIES)
-
-        return self._properties
-
-    async def devices_serialize(self):
-        """Serialize entity for a devices response.
+    def devices_name(self) -> Optional[str]:
+        """Return name for a devices response.
 
-        https://yandex.ru/dev/dialogs/alice/doc/smart-home/reference/get-devices-docpage/
+        None means the entity is left out of devices responses, whatever
+        capabilities it supports (checked without building entity plan).
         """
         state = self.state
 
@@ -142,13 +799,24 @@ class YandexEntity:
         if state.state == STATE_UNAVAILABLE:
             return None
 
-        entity_config = self.config.entity_config.get(state.entity_id, {})
-        name = (entity_config.get(CONF_NAME) or state.name).strip()
-
         # If an empty string
-        if not name:
+        return (self.entity_config.name or state.name).strip() or None
+
+    def devices_serialize(self, registry: RegistrySnapshot):
+        """Serialize entity for a devices response.
+
+        Reads only given registries snapshot and, when created with a states
+        snapshot, never the state machine, so it is safe to run in an
+        executor thread.
+
+        https://yandex.ru/dev/dialogs/alice/doc/smart-home/reference/get-devices-docpage/
+        """
+        state = self.state
+        name = self.devices_name()
+        if name is None:
             return None
 
+        entity_config = self.entity_config
         capabilities = self.capabilities()
         properties = self.properties()
 
@@ -156,81 +824,54 @@ class YandexEntity:
         if not capabilities and not properties:
             return None
 
-        device_type = entity_config.get(CONF_TYPE)
+        device_type = entity_config.type
         if device_type:
             _LOGGER.debug('Entity [%s] is forcefully exposed as `%s`' % (state.entity_id, device_type))
         else:
-            device_type = determine_state_type(self.hass, state, entity_config)
+            device_type = self.plan().get_device_type(self.hass, state, entity_config)
+
+        capability_descriptions, property_descriptions = self.plan().get_descriptions(
+            self.states, state, entity_config, self.config.descriptions
+        )
 
         device = {
             'id': state.entity_id,
             'name': name,
             'type': device_type,
-            'capabilities': [],
-            'properties': [],
+            'capabilities': capability_descriptions,
+            'properties': property_descriptions,
         }
 
-        for cpb in capabilities:
-            description = cpb.description()
-            if description not in device['capabilities']:
-                device['capabilities'].append(description)
-
-        for ppt in properties:
-            description = ppt.description()
-            if description not in device['properties']:
-                device['properties'].append(description)
-
-        room = entity_config.get(CONF_ROOM)
+        room = entity_config.room
         if room:
             device['room'] = room
 
-        device_info_attributes = ['manufacturer', 'model', 'sw_version', 'hw_version']
         device_info = {}
-        for attr in device_info_attributes:
+        for attr in DEVICE_INFO_ATTRIBUTES:
             value = state.attributes.get(attr)
             if value:
                 device_info[attr] = value
 
-        if device_info:
-            device['device_info'] = device_info
-
-        dev_reg, ent_reg = await gather(
-            self.hass.helpers.device_registry.async_get_registry(),
-            self.hass.helpers.entity_registry.async_get_registry(),
-        )
-
-        entity_entry = ent_reg.async_get(state.entity_id)
-        if not (entity_entry and entity_entry.device_id):
-            return device
-
-        device_entry = dev_reg.devices.get(entity_entry.device_id)  # type: DeviceEntry
-
-        if not device_entry:
-            return device
-
-        for attr in device_info_attributes:
-            # Device info overrides entity attributes
-            # This may change in the future
-            value = getattr(device_entry, attr) if hasattr(device_entry, attr) else None
-            if value:
-                device_info[attr] = value
+        # Device info overrides entity attributes
+        # This may change in the future
+        device_info.update(registry.device_info.get(state.entity_id, ()))
 
         if device_info:
             device['device_info'] = device_info
 
-        if 'room' not in device and device_entry.area_id:
-            area_reg = await self.hass.helpers.area_registry.async_get_registry()
-
-            area_entry = area_reg.areas.get(device_entry.area_id)
-            if area_entry and area_entry.name:
-                device['room'] = area_entry.name
+        if 'room' not in device:
+            area = registry.areas.get(state.entity_id)
+            if area:
+                device['room'] = area
 
         return device
 
-    @callback
     def query_serialize(self):
         """Serialize entity for a query response.
 
+        Only entity state and states snapshot are read, so the result is
+        consistent across entities sharing a snapshot.
+
         https://yandex.ru/dev/dialogs/alice/doc/smart-home/reference/post-devices-query-docpage/
         """
         state = self.state
@@ -238,15 +879,17 @@ class YandexEntity:
         if state.state == STATE_UNAVAILABLE:
             return {'error_code': ERR_DEVICE_UNREACHABLE}
 
+        states = self.states
+        entity_config = self.entity_config
         capabilities = []
 
         for cpb in self.capabilities():
-            if cpb.retrievable:
-                capabilities.append(cpb.get_state())
+            if cpb.is_retrievable(state, entity_config):
+                capabilities.append(cpb.get_state(states, state, entity_config))
 
         properties = []
         for ppt in self.properties():
-            properties.append(ppt.get_state())
+            properties.append(ppt.get_state(states, state, entity_config))
 
         return {
             'id': state.entity_id,
@@ -254,12 +897,8 @@ class YandexEntity:
             'properties': properties,
         }
 
-    async def execute(self, data: RequestData, capability_type, state):
-        """Execute action.
-
-        https://yandex.ru/dev/dialogs/alice/doc/smart-home/reference/post-action-docpage/
-        """
-        executed = False
+    def _get_capability(self, capability_type, state):
+        """Find capability which handles given action."""
         if state is None or 'instance' not in state:
             raise SmartHomeError(
                 ERR_INVALID_VALUE,
@@ -270,26 +909,69 @@ class YandexEntity:
         instance = state['instance']
         for cpb in self.capabilities():
             if capability_type == cpb.type and instance == cpb.instance:
-                await cpb.set_state(data, state)
-                executed = True
-                break
+                return cpb
 
-        if not executed:
-            raise SmartHomeError(
-                ERR_NOT_SUPPORTED_IN_CURRENT_MODE,
-                "Unable to execute %s / %s for %s"
-                % (capability_type, instance, self.state.entity_id)
-            )
+        raise SmartHomeError(
+            ERR_NOT_SUPPORTED_IN_CURRENT_MODE,
+            "Unable to execute %s / %s for %s"
+            % (capability_type, instance, self.state.entity_id)
+        )
+
+    async def execute_all(self, data: RequestData, actions: Iterable[Tuple[str, Dict]]) -> Dict[str, str]:
+        """Execute actions in order, merging adjacent compatible service calls into one.
+
+        Errors (including unexpected ones) are reported per capability, so
+        that a failure does not affect actions of other devices.
+
+        https://yandex.ru/dev/dialogs/alice/doc/smart-home/reference/post-action-docpage/
+
+        :param data: Request data
+        :param actions: Capability type and state pairs
+        :return: Error codes by capability type
+        """
+        errors = {}
+        steps = []  # [capability types, capability, state, service call]
+
+        for capability_type, state in actions:
+            try:
+                cpb = self._get_capability(capability_type, state)
+                service_call = cpb.get_service_call(self.state, self.entity_config, state)
+            except SmartHomeError as err:
+                _LOGGER.error("%s: %s" % (err.code, err.message))
+                errors[capability_type] = err.code
+                continue
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Unexpected error preparing %s for %s", capability_type, self.entity_id)
+                errors[capability_type] = ERR_INTERNAL_ERROR
+                continue
+
+            if service_call is not None and steps:
+                last_call = steps[-1][3]
+                if last_call is not None and last_call.merge(service_call):
+                    steps[-1][0].append(capability_type)
+                    continue
+
+            steps.append([[capability_type], cpb, state, service_call])
+
+        for capability_types, cpb, state, service_call in steps:
+            try:
+                if service_call is None:
+                    await cpb.set_state(self.hass, self.state, self.entity_config, data, state)
+                else:
+                    await service_call.async_call(self.hass, self.entity_id, data.context)
+            except SmartHomeError as err:
+                _LOGGER.error("%s: %s" % (err.code, err.message))
+                for capability_type in capability_types:
+                    errors[capability_type] = err.code
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Unexpected error executing %s for %s", ', '.join(capability_types), self.entity_id)
+                for capability_type in capability_types:
+                    errors[capability_type] = ERR_INTERNAL_ERROR
+
+        return errors
 
     @callback
     def async_update(self):
         """Update the entity with latest info from Home Assistant."""
         self.state = self.hass.states.get(self.entity_id)
-
-        if self._capabilities:
-            for trt in self._capabilities:
-                trt.state = self.state
-
-        if self._properties:
-            for prp in self._properties:
-                prp.state = self.state
+        self._plan = None
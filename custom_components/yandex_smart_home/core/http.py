@@ -1,5 +1,4 @@
 """Support for Yandex Smart Home."""
-import ipaddress
 import logging
 from json import JSONDecodeError
 from types import SimpleNamespace
@@ -7,10 +6,13 @@ from typing import TYPE_CHECKING, Tuple, Union, Optional
 from uuid import uuid4
 
 from aiohttp.web import Request, Response
-from aiohttp.web_exceptions import HTTPUnauthorized, HTTPBadRequest, HTTPNotFound
+from aiohttp.web_exceptions import HTTPUnauthorized, HTTPBadRequest, HTTPNotFound, HTTPTooManyRequests, \
+    HTTPInternalServerError
 from homeassistant.components.http import HomeAssistantView
+from homeassistant.const import CONTENT_TYPE_JSON, HTTP_OK
 
 from ..const import DOMAIN
+from ..core.helpers import encode_json
 from ..core.smart_home import async_handle_message
 
 if TYPE_CHECKING:
@@ -62,14 +64,8 @@ class YandexSmartHomeView(YandexSmartHomeUnauthorizedView):
 
         hass_user = request.get('hass_user')
         request_id = request.headers.get('X-Request-Id')
-        remote_accepted = False
-        if config.diagnostics_mode:
-            remote_address = ipaddress.ip_address(request.remote)
-            for network in config.diagnostics_mode:
-                if remote_address in network:
-                    remote_accepted = True
-                    break
-                    
+        remote_accepted = bool(config.diagnostics_mode) and config.diagnostics_networks.match(request.remote)
+
         if remote_accepted:
             # Facilitate the use of diagnostics mode by adding dummy data to the request
             if not hass_user:
@@ -83,9 +79,45 @@ class YandexSmartHomeView(YandexSmartHomeUnauthorizedView):
         
         return config, hass_user, request_id
 
+    @staticmethod
+    def _process_rate_limit(config: 'Config', hass_user: Union[SimpleNamespace, 'User'], action: str) -> None:
+        if config.rate_limiter.consume(hass_user.id, action):
+            return
+
+        _LOGGER.debug("Rate limit exceeded for %s by user %s", action, hass_user.id)
+        if config.sensor_status:
+            config.sensor_status.record_rate_limited()
+
+        raise HTTPTooManyRequests()
+
+    @staticmethod
+    def json(result, status_code=HTTP_OK, headers=None) -> Response:
+        """Return a JSON response (pre-encoded fragments are embedded as is)."""
+        try:
+            msg = encode_json(result).encode("UTF-8")
+        except (ValueError, TypeError) as err:
+            _LOGGER.error("Unable to serialize to JSON: %s\n%s", err, result)
+            raise HTTPInternalServerError()
+        response = Response(
+            body=msg,
+            content_type=CONTENT_TYPE_JSON,
+            status=status_code,
+            headers=headers,
+        )
+        response.enable_compression()
+        return response
+
+    async def _async_json(self, request: Request, config: 'Config', result) -> Response:
+        if config.serialize_in_executor:
+            return await request.app['hass'].async_add_executor_job(self.json, result)
+
+        return self.json(result)
+
     async def post(self, request: Request) -> Response:
         """Handle Yandex Smart Home POST requests."""
         config, hass_user, request_id = self._process_auth(request)
+        action = request.path.replace(self.url, '', 1)
+        self._process_rate_limit(config, hass_user, action)
 
         try:
             message = await request.json()
@@ -94,29 +126,35 @@ class YandexSmartHomeView(YandexSmartHomeUnauthorizedView):
             message = {}
             _LOGGER_REQUEST.debug("Request: %s (POST data: %s)" % (request.url, await request.text()))
 
-        result = await async_handle_message(
-            request.app['hass'],
-            config,
-            hass_user.id,
-            request_id,
-            request.path.replace(self.url, '', 1),
-            message)
+        result = await config.request_cache.async_get_or_run(
+            (hass_user.id, request_id, action),
+            lambda: async_handle_message(
+                request.app['hass'],
+                config,
+                hass_user.id,
+                request_id,
+                action,
+                message))
 
         _LOGGER_RESPONSE.debug("Response: %s", result)
-        return self.json(result)
+        return await self._async_json(request, config, result)
 
     async def get(self, request: Request) -> Response:
         """Handle Yandex Smart Home GET requests."""
         config, hass_user, request_id = self._process_auth(request)
+        action = request.path.replace(self.url, '', 1)
+        self._process_rate_limit(config, hass_user, action)
 
         _LOGGER_REQUEST.debug("Request: %s" % request.url)
-        result = await async_handle_message(
-            request.app['hass'],
-            config,
-            hass_user.id,
-            request_id,
-            request.path.replace(self.url, '', 1),
-            {})
+        result = await config.request_cache.async_get_or_run(
+            (hass_user.id, request_id, action),
+            lambda: async_handle_message(
+                request.app['hass'],
+                config,
+                hass_user.id,
+                request_id,
+                action,
+                {}))
 
         _LOGGER_RESPONSE.debug("Response: %s" % result)
-        return self.json(result)
+        return await self._async_json(request, config, result)
@@ -1,6 +1,9 @@
 """Support for Yandex Smart Home API."""
 import logging
+from asyncio import gather
 from datetime import datetime
+from types import MappingProxyType
+from typing import Callable, List, Mapping, Optional, Set, Tuple, Union
 
 from homeassistant.const import CLOUD_NEVER_EXPOSED_ENTITIES
 from homeassistant.helpers.typing import HomeAssistantType
@@ -8,10 +11,13 @@ from homeassistant.util.decorator import Registry
 
 from ..const import (
     ERR_INTERNAL_ERROR, ERR_DEVICE_UNREACHABLE,
-    ERR_DEVICE_NOT_FOUND, ATTR_YANDEX_TYPE
+    ERR_DEVICE_NOT_FOUND, ATTR_YANDEX_TYPE,
+    CONF_MAX_DEVICES, CONF_MAX_BYTES, CONF_PRIORITY, SYNC_PRIORITY_AREA
 )
 from ..core.error import SmartHomeError
-from ..core.helpers import RequestData, YandexEntity
+from ..core.helpers import (
+    JSONFragment, RequestData, RegistrySnapshot, YandexEntity, get_states_snapshot, is_successful_response
+)
 
 HANDLERS = Registry()
 _LOGGER = logging.getLogger(__name__)
@@ -24,9 +30,15 @@ async def async_handle_message(hass: HomeAssistantType, config, user_id, request
 
     response = await _process(hass, data, action, message)
 
-    if response and 'payload' in response and 'error_code' in response['payload']:
+    payload = response.get('payload') if response else None
+    is_error = not is_successful_response(response)
+    if is_error:
         _LOGGER.error('Error handling message %s: %s',
-                      message, response['payload'])
+                      message, payload)
+
+    yandex_sensor = config.sensor_status
+    if yandex_sensor:
+        yandex_sensor.record_request(action, len(payload.get('devices', ())) if payload else 0, is_error)
 
     return response
 
@@ -67,20 +79,58 @@ async def _process(hass: HomeAssistantType, data: RequestData, action, message):
     return {'request_id': data.request_id, 'payload': result}
 
 
-# noinspection PyUnusedLocal
-@HANDLERS.register('/user/devices')
-async def async_devices_sync(hass: HomeAssistantType, data: RequestData, message):
-    """Handle /user/devices request.
+async def _async_serialize(hass: HomeAssistantType, data: RequestData, target: Callable, *args):
+    """Run serialization either inline or in an executor thread (see `serialize_in_executor` option)."""
+    if data.config.serialize_in_executor:
+        return await hass.async_add_executor_job(target, *args)
 
-    https://yandex.ru/dev/dialogs/alice/doc/smart-home/reference/get-devices-docpage/
+    return target(*args)
 
-    :param hass: HomeAssistant object
-    :param data: Request data
-    :param message: Message contents
-    :return: Optional response
+
+def _get_entity_area(entity: YandexEntity, registry: RegistrySnapshot) -> Optional[str]:
+    """Return room of entity from configuration or device area."""
+    return entity.entity_config.room or registry.areas.get(entity.entity_id)
+
+
+def _prioritize_entities(entities: List[YandexEntity], priority: str,
+                         registry: RegistrySnapshot) -> List[YandexEntity]:
     """
-    devices = []
-    for state in hass.states.async_all():
+    Order entities for a truncated devices response.
+    :param entities: Entities to order
+    :param priority: Priority mode (entity registry order, or grouped by area in registry order)
+    :param registry: Registries snapshot
+    :return: Entities, most important first
+    """
+    registry_order = registry.order
+    unregistered = len(registry_order)
+
+    if priority == SYNC_PRIORITY_AREA:
+        def sort_key(entity: YandexEntity):
+            area = _get_entity_area(entity, registry)
+            return area is None, area or '', registry_order.get(entity.entity_id, unregistered)
+    else:
+        def sort_key(entity: YandexEntity):
+            return registry_order.get(entity.entity_id, unregistered)
+
+    return sorted(entities, key=sort_key)
+
+
+def _devices_serialize(hass: HomeAssistantType, data: RequestData,
+                       registry: RegistrySnapshot) -> Tuple[List[Union[dict, JSONFragment]], int]:
+    """
+    Serialize exposed entities for a devices response (reads only the states and registries snapshots).
+
+    When `sync_limit` option is set, entities are serialized in priority
+    order until the device count or response size budget is exhausted.
+    The rest are never serialized and their plans are not built; they are
+    counted unless unavailable or nameless, so the count is an upper bound
+    (entities without supported capabilities are counted as well).
+    Devices measured for the size budget are kept encoded.
+
+    :return: Serialized devices, count of devices left out of the response
+    """
+    entities = []
+    for state in data.states.values():
         if state.entity_id in CLOUD_NEVER_EXPOSED_ENTITIES:
             continue
 
@@ -90,47 +140,96 @@ async def async_devices_sync(hass: HomeAssistantType, data: RequestData, message
         if not data.config.should_expose(state.entity_id):
             continue
 
-        entity = YandexEntity(hass, data.config, state)
-        serialized = await entity.devices_serialize()
+        entities.append(YandexEntity(hass, data, state))
+
+    max_devices = max_bytes = None
+    sync_limit = data.config.sync_limit
+    if sync_limit:
+        entities = _prioritize_entities(entities, sync_limit[CONF_PRIORITY], registry)
+        max_devices = sync_limit.get(CONF_MAX_DEVICES)
+        max_bytes = sync_limit.get(CONF_MAX_BYTES)
+
+    devices = []
+    response_size = 0
+    for index, entity in enumerate(entities):
+        if max_devices is not None and len(devices) >= max_devices:
+            break
+
+        serialized = entity.devices_serialize(registry)
 
         if serialized is None:
             _LOGGER.debug("No mapping for %s domain", entity.state)
             continue
 
+        if max_bytes is not None:
+            serialized = JSONFragment(serialized)
+            # Account for the list item separator as well
+            response_size += len(serialized.encoded) + 2
+            if response_size > max_bytes:
+                break
+
         devices.append(serialized)
+    else:
+        return devices, 0
 
-    response = {
-        'user_id': data.context.user_id,
-        'devices': devices,
-    }
+    truncated = [entity.entity_id for entity in entities[index:] if entity.devices_name() is not None]
+    _LOGGER.debug("Devices left out of the response due to sync limit: %s", truncated)
 
-    return response
+    return devices, len(truncated)
 
 
 # noinspection PyUnusedLocal
-@HANDLERS.register('/user/devices/query')
-async def async_devices_query(hass: HomeAssistantType, data: RequestData, message):
-    """Handle /user/devices/query request.
+@HANDLERS.register('/user/devices')
+async def async_devices_sync(hass: HomeAssistantType, data: RequestData, message):
+    """Handle /user/devices request.
 
-    https://yandex.ru/dev/dialogs/alice/doc/smart-home/reference/post-devices-query-docpage/
+    https://yandex.ru/dev/dialogs/alice/doc/smart-home/reference/get-devices-docpage/
 
     :param hass: HomeAssistant object
     :param data: Request data
     :param message: Message contents
     :return: Optional response
     """
-    devices = []
-    for device in message.get('devices', []):
-        entity_id = device['id']
+    data.states = MappingProxyType({state.entity_id: state for state in hass.states.async_all()})
+    data.config.prune_entity_plans(data.states)
+    registry = await data.async_get_registry(hass)
+
+    devices, truncated_count = await _async_serialize(hass, data, _devices_serialize, hass, data, registry)
+
+    if truncated_count:
+        _LOGGER.warning("%d devices were left out of the devices response due to sync limit", truncated_count)
+
+    yandex_sensor = data.config.sensor_status
+    if yandex_sensor and data.config.sync_limit:
+        yandex_sensor.record_sync_truncation(truncated_count)
+
+    response = {
+        'user_id': data.user_id,
+        'devices': devices,
+    }
+
+    return response
+
 
-        if not data.config.should_expose(entity_id):
+def _get_query_cache_key(entity_ids: List[str], snapshot: Mapping):
+    """Key query response by requested entities (in order) and the latest update of them and their override sources."""
+    last_updated = max((state.last_updated for state in snapshot.values()), default=None)
+    return tuple(entity_ids), len(snapshot), last_updated
+
+
+def _query_serialize(hass: HomeAssistantType, data: RequestData, entity_ids: List[str],
+                     exposed_entity_ids: Set[str]) -> List[dict]:
+    """Serialize requested entities for a query response (reads only the states snapshot)."""
+    devices = []
+    for entity_id in entity_ids:
+        if entity_id not in exposed_entity_ids:
             devices.append({
                 'id': entity_id,
                 'error_code': ERR_DEVICE_NOT_FOUND,
             })
             continue
 
-        state = hass.states.get(entity_id)
+        state = data.states.get(entity_id)
 
         if not state or state.attributes.get(ATTR_YANDEX_TYPE) is False:
             # If we can't find a state, the device is unreachable
@@ -140,14 +239,50 @@ async def async_devices_query(hass: HomeAssistantType, data: RequestData, messag
             })
             continue
 
-        entity = YandexEntity(hass, data.config, state)
+        entity = YandexEntity(hass, data, state)
         devices.append(entity.query_serialize())
 
+    return devices
+
+
+# noinspection PyUnusedLocal
+@HANDLERS.register('/user/devices/query')
+async def async_devices_query(hass: HomeAssistantType, data: RequestData, message):
+    """Handle /user/devices/query request.
+
+    https://yandex.ru/dev/dialogs/alice/doc/smart-home/reference/post-devices-query-docpage/
+
+    :param hass: HomeAssistant object
+    :param data: Request data
+    :param message: Message contents
+    :return: Optional response
+    """
+    entity_ids = [device['id'] for device in message.get('devices', [])]
+    exposed_entity_ids = set(filter(data.config.should_expose, entity_ids))
+    data.states = get_states_snapshot(hass, data.config, exposed_entity_ids)
+
     yandex_sensor = data.config.sensor_status
+
+    query_cache = data.config.query_cache
+    if query_cache:
+        cache_key = _get_query_cache_key(entity_ids, data.states)
+        response = query_cache.get(cache_key)
+        if response is not None:
+            if yandex_sensor:
+                yandex_sensor.record_sync(datetime.now(), response['devices'])
+            return response
+
+    devices = await _async_serialize(hass, data, _query_serialize,
+                                     hass, data, entity_ids, exposed_entity_ids)
+
     if yandex_sensor:
         yandex_sensor.record_sync(datetime.now(), devices)
 
-    return {'devices': devices}
+    response = {'devices': devices}
+    if query_cache:
+        query_cache.set(cache_key, response)
+
+    return response
 
 
 # noinspection PyUnusedLocal
@@ -165,7 +300,7 @@ async def handle_devices_execute(hass: HomeAssistantType, data: RequestData, mes
     entities = {}
     devices = {}
     results = {}
-    action_errors = {}
+    actions = {}
 
     for device in message['payload']['devices']:
         entity_id = device['id']
@@ -188,18 +323,19 @@ async def handle_devices_execute(hass: HomeAssistantType, data: RequestData, mes
                 }
                 continue
 
-            entities[entity_id] = YandexEntity(hass, data.config, state)
-
-        for capability in device['capabilities']:
-            try:
-                await entities[entity_id].execute(data,
-                                                  capability.get('type', ''),
-                                                  capability.get('state', {}))
-            except SmartHomeError as err:
-                _LOGGER.error("%s: %s" % (err.code, err.message))
-                if entity_id not in action_errors:
-                    action_errors[entity_id] = {}
-                action_errors[entity_id][capability['type']] = err.code
+            entities[entity_id] = YandexEntity(hass, data, state)
+            actions[entity_id] = []
+
+        actions[entity_id].extend(
+            (capability.get('type', ''), capability.get('state', {}))
+            for capability in device['capabilities']
+        )
+
+    # actions of a single device are executed in order, different devices are handled concurrently
+    action_errors = dict(zip(actions, await gather(*(
+        entities[entity_id].execute_all(data, entity_actions)
+        for entity_id, entity_actions in actions.items()
+    ))))
 
     final_results = list(results.values())
 
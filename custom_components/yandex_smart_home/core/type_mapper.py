@@ -1,6 +1,7 @@
 """Type mapper to infer yandex entity types from HomeAssistant's domains"""
+from typing import Callable, Dict, Tuple, Optional, Any, Iterable
 
-from homeassistant.components import (
+from ..core.components import (
     automation,
     binary_sensor,
     camera,
@@ -42,6 +43,22 @@ from ..const import (
     ATTR_YANDEX_TYPE,
 )
 
+TypePredicate = Callable[[HomeAssistantType, State, Any], Any]
+
+
+def _lazy_device_class_predicate(get_device_classes: Callable[[], Iterable[str]]) -> TypePredicate:
+    """Device class predicate for device classes defined by components, which are resolved on first call."""
+    device_classes = None
+
+    def predicate(h, s, c):
+        nonlocal device_classes
+        if device_classes is None:
+            device_classes = frozenset(get_device_classes())
+        return s.attributes.get(ATTR_DEVICE_CLASS) in device_classes
+
+    return predicate
+
+
 MAPPING_DEFAULT = "default"
 DOMAIN_TO_YANDEX_TYPES = {
     automation.DOMAIN: TYPE_OTHER,
@@ -53,13 +70,13 @@ DOMAIN_TO_YANDEX_TYPES = {
     },
     cover.DOMAIN: {
         MAPPING_DEFAULT: TYPE_OPENABLE,
-        TYPE_OPENABLE_CURTAIN: [
+        TYPE_OPENABLE_CURTAIN: _lazy_device_class_predicate(lambda: [
             cover.DEVICE_CLASS_SHADE,
             cover.DEVICE_CLASS_SHUTTER,
             cover.DEVICE_CLASS_CURTAIN,
             cover.DEVICE_CLASS_BLIND,
             cover.DEVICE_CLASS_AWNING,
-        ]
+        ])
     },
     fan.DOMAIN: {
         MAPPING_DEFAULT: TYPE_THERMOSTAT,
@@ -74,9 +91,9 @@ DOMAIN_TO_YANDEX_TYPES = {
     lock.DOMAIN: TYPE_OPENABLE,
     media_player.DOMAIN: {
         MAPPING_DEFAULT: TYPE_MEDIA_DEVICE,
-        TYPE_MEDIA_DEVICE_TV: [
+        TYPE_MEDIA_DEVICE_TV: _lazy_device_class_predicate(lambda: [
             media_player.DEVICE_CLASS_TV,
-        ],
+        ]),
         TYPE_MEDIA_DEVICE_TV_BOX: [
             DEVICE_CLASS_ANDROIDTV,
             DEVICE_CLASS_FIRETV
@@ -86,7 +103,7 @@ DOMAIN_TO_YANDEX_TYPES = {
     script.DOMAIN: TYPE_OTHER,
     switch.DOMAIN: {
         MAPPING_DEFAULT: TYPE_SWITCH,
-        TYPE_SOCKET: [switch.DEVICE_CLASS_OUTLET],
+        TYPE_SOCKET: _lazy_device_class_predicate(lambda: [switch.DEVICE_CLASS_OUTLET]),
     },
     vacuum.DOMAIN: TYPE_VACUUM_CLEANER,
 }
@@ -107,28 +124,57 @@ def get_supported_types():
     return supported_types.keys()
 
 
-def determine_state_type(hass: HomeAssistantType, state: State, entity_config):
-    """Yandex type based on domain and device class."""
-    if ATTR_YANDEX_TYPE in state.attributes:
-        return state.attributes[ATTR_YANDEX_TYPE]
-        
-    default_type = TYPE_OTHER
-    yandex_type = DOMAIN_TO_YANDEX_TYPES.get(state.domain)
-    if isinstance(yandex_type, dict):
+def _device_class_predicate(device_classes) -> TypePredicate:
+    device_classes = frozenset(device_classes)
+    return lambda h, s, c: s.attributes.get(ATTR_DEVICE_CLASS) in device_classes
+
+
+def compile_type_resolvers(mapping: Dict[str, Any]) -> Dict[str, Tuple[str, Tuple[Tuple[str, TypePredicate], ...]]]:
+    """
+    Compile domain mapping into default types and ordered subtype predicates.
+    :param mapping: Domain mapping (see `DOMAIN_TO_YANDEX_TYPES`)
+    :return: Domain -> (default type, ((subtype, predicate), ...))
+    """
+    resolvers = {}
+    for domain, yandex_type in mapping.items():
+        if not isinstance(yandex_type, dict):
+            resolvers[domain] = (yandex_type, ())
+            continue
+
+        default_type = TYPE_OTHER
+        predicates = []
         for subtype, mapping_function in yandex_type.items():
             if subtype == MAPPING_DEFAULT:
                 default_type = mapping_function
-
             elif callable(mapping_function):
-                if mapping_function(hass, state, entity_config):
-                    return subtype
-
+                predicates.append((subtype, mapping_function))
             else:
-                device_class = state.attributes.get(ATTR_DEVICE_CLASS)
-                if device_class in mapping_function:
-                    return subtype
+                predicates.append((subtype, _device_class_predicate(mapping_function)))
+
+        resolvers[domain] = (default_type, tuple(predicates))
+
+    return resolvers
+
+
+DOMAIN_TYPE_RESOLVERS = compile_type_resolvers(DOMAIN_TO_YANDEX_TYPES)
+
+
+def determine_state_type(hass: HomeAssistantType, state: State, entity_config) -> str:
+    """Yandex type based on domain and device class.
+
+    Types depend only on entity attributes and config, so callers keep the
+    result on the entity plan (see `EntityPlan.get_device_type`).
+    """
+    if ATTR_YANDEX_TYPE in state.attributes:
+        return state.attributes[ATTR_YANDEX_TYPE]
+
+    resolver: Optional[Tuple[str, Tuple[Tuple[str, TypePredicate], ...]]] = DOMAIN_TYPE_RESOLVERS.get(state.domain)
+    if resolver is None:
+        return TYPE_OTHER
 
-    elif isinstance(yandex_type, str):
-        return yandex_type
+    default_type, predicates = resolver
+    for subtype, predicate in predicates:
+        if predicate(hass, state, entity_config):
+            return subtype
 
     return default_type
@@ -1,8 +1,13 @@
 """Implement the Yandex Smart Home capabilities."""
 import logging
-from typing import Any, Optional, Dict, TYPE_CHECKING, Tuple, Type, List, Union, Mapping, Sequence, Callable, Iterable
-
-from homeassistant.components import (
+from collections import OrderedDict
+from threading import Lock
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Optional, Dict, TYPE_CHECKING, Tuple, Type, List, Union, Mapping, Sequence, Callable, Iterable, \
+    Hashable
+
+from ..core.components import (
     automation,
     camera,
     climate,
@@ -19,9 +24,6 @@ from homeassistant.components import (
     water_heater,
     lock,
 )
-from homeassistant.components.water_heater import (
-    STATE_ELECTRIC, SERVICE_SET_OPERATION_MODE
-)
 from homeassistant.const import (
     ATTR_ENTITY_ID,
     ATTR_SUPPORTED_FEATURES,
@@ -32,8 +34,7 @@ from homeassistant.const import (
     SERVICE_LOCK,
     SERVICE_UNLOCK,
     STATE_OFF,
-    STATE_ON, CONF_ENTITY_ID,
-    CONF_MAXIMUM, CONF_MINIMUM
+    STATE_ON,
 )
 from homeassistant.core import DOMAIN as HA_DOMAIN, State
 from homeassistant.helpers.script import Script
@@ -43,10 +44,8 @@ from homeassistant.util import color as color_util
 from ..const import (
     ERR_INVALID_VALUE,
     ERR_NOT_SUPPORTED_IN_CURRENT_MODE, CONF_PROGRAMS,
-    CONF_CHANNEL_SET_VIA_MEDIA_CONTENT_ID, CONF_RELATIVE_VOLUME_ONLY,
-    CONF_INPUT_SOURCES, CONF_ENTITY_TOGGLES,
-    CONF_SCRIPT_CHANNEL_UP, CONF_SCRIPT_CHANNEL_DOWN, CONF_ENTITY_MODES, CONF_MAPPING, ERR_INTERNAL_ERROR,
-    CONF_SET_SCRIPT, CONF_PRECISION, CONF_MULTIPLIER, CONF_ENTITY_RANGES, MODES_NUMERIC, ATTR_VALUE)
+    CONF_INPUT_SOURCES, ERR_INTERNAL_ERROR, MODES_NUMERIC, ATTR_VALUE)
+from ..core.entity_config import EntityConfig, ModeOverrideConfig, RangeOverrideConfig
 from ..core.error import SmartHomeError, DefaultNotImplemented, \
     OverrideNotImplemented
 
@@ -62,12 +61,12 @@ CAPABILITIES_RANGE = PREFIX_CAPABILITIES + 'range'
 CAPABILITIES_MODE = PREFIX_CAPABILITIES + 'mode'
 CAPABILITIES_COLOR_SETTING = PREFIX_CAPABILITIES + 'color_setting'
 
-CAPABILITIES: List[Type['_Capability']] = []
+CAPABILITIES: List['_Capability'] = []
 
 
-def register_capability(capability):
-    """Decorate a function to register a capability."""
-    CAPABILITIES.append(capability)
+def register_capability(capability: Type['_Capability']):
+    """Decorate a class to register its (only) capability instance."""
+    CAPABILITIES.append(capability())
     return capability
 
 
@@ -90,29 +89,146 @@ class _CompatibilityConfig:
     def is_compatible(self, domain: str, features: int, attributes: Dict[str, Any]) -> bool:
         return self.domain == domain and (self.required_feature is None or features & self.required_feature)
 
+    def get_attributes_key(self, attributes: Dict[str, Any]) -> Hashable:
+        """Return hashable key of attributes that compatibility depends on."""
+        return None
+
+
+class _LRUCache:
+    """Mapping which keeps only a limited number of most recently used entries.
+
+    Keys are derived from entity attributes (e.g. modes lists), which may
+    take arbitrarily many values over time, so memoized results are bounded.
+    Capabilities are also used from executor threads (see
+    `serialize_in_executor` option), so access is locked.
+    """
+
+    __slots__ = ('_maxsize', '_entries', '_lock')
+
+    def __init__(self, maxsize: int):
+        self._maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getitem__(self, key: Hashable) -> Any:
+        with self._lock:
+            value = self._entries[key]
+            self._entries.move_to_end(key)
+            return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            entries = self._entries
+            entries[key] = value
+            if len(entries) > self._maxsize:
+                entries.popitem(last=False)
+
+
+# (Capability class, domain, features, attributes keys) -> compatibility config
+_COMPATIBILITY_CONFIGS_CACHE = _LRUCache(1024)
+
+
+class _LazyDomainConfigs:
+    """Capability configs (e.g. compatibility configs), grouped by domain.
+
+    Configs refer to constants of Home Assistant components, so they are
+    constructed per domain on first use. This way only components of
+    domains actually exposed get imported.
+    """
+
+    __slots__ = ('_factories', '_configs')
+
+    def __init__(self, factories: Mapping[str, Callable[[], Iterable[Any]]]):
+        """
+        Initialize lazy configs.
+        :param factories: Domain -> callable returning configs of the domain
+        """
+        self._factories = factories
+        self._configs: Dict[str, Tuple[Any, ...]] = {}
+
+    def get(self, domain: str) -> Tuple[Any, ...]:
+        """Return configs of given domain."""
+        try:
+            return self._configs[domain]
+        except KeyError:
+            factory = self._factories.get(domain)
+            # configs built concurrently by another thread take precedence
+            return self._configs.setdefault(domain, tuple(factory()) if factory else ())
+
+
+class ServiceCall:
+    """Service call which sets capability state of an entity.
+
+    Calls of different capabilities to the same service may be merged into
+    one, unless their service data overlap or they belong to the same
+    exclusive group (e.g. only one of light color settings can be set).
+    """
+
+    __slots__ = ('domain', 'service', 'data', 'blocking', 'exclusive')
+
+    def __init__(self, domain: str, service: str, data: Dict[str, Any], blocking: bool = True,
+                 exclusive: Iterable[str] = ()):
+        """
+        Initialize service call.
+        :param domain: Service domain
+        :param service: Service name
+        :param data: Service data (without entity ID)
+        :param blocking: Whether to wait for the call to complete
+        :param exclusive: Exclusive groups of the call
+        """
+        self.domain = domain
+        self.service = service
+        self.data = data
+        self.blocking = blocking
+        self.exclusive = frozenset(exclusive)
+
+    def merge(self, other: 'ServiceCall') -> bool:
+        """Merge other call into this one, if possible."""
+        if self.domain != other.domain or self.service != other.service or self.blocking != other.blocking:
+            return False
+
+        if self.exclusive & other.exclusive or not self.data.keys().isdisjoint(other.data):
+            return False
+
+        self.data.update(other.data)
+        self.exclusive |= other.exclusive
+        return True
+
+    async def async_call(self, hass: HomeAssistantType, entity_id: str, context) -> None:
+        """Call service for given entity."""
+        await hass.services.async_call(
+            self.domain,
+            self.service,
+            {ATTR_ENTITY_ID: entity_id, **self.data},
+            blocking=self.blocking,
+            context=context
+        )
+
 
 class _Capability(object):
-    """Represents a Capability."""
+    """Represents a Capability.
+
+    A single registered instance serves every entity, therefore capabilities
+    must not store entity-related data: the state and the entity config are
+    passed explicitly to every method.
+    """
+
+    __slots__ = ()
 
     type = NotImplemented
     instance = NotImplemented
     retrievable = True
 
-    def __init__(self, hass: HomeAssistantType, state: State, entity_config: Dict):
-        """Initialize a trait for a state."""
-        self.hass = hass
-        self.state = state
-        self.entity_config = entity_config
-
-        self.use_override = self.has_override(state.domain, entity_config, state.attributes)
-
     @classmethod
-    def supported(cls, domain: str, features: int, entity_config: Dict, attributes: Dict) -> bool:
+    def supported(cls, domain: str, features: int, entity_config: EntityConfig, attributes: Dict) -> bool:
         """Check whether current entity is supported."""
         return False
 
     @classmethod
-    def has_override(cls, domain: str, entity_config: Dict, attributes: Dict) -> bool:
+    def has_override(cls, domain: str, entity_config: EntityConfig, attributes: Dict) -> bool:
         """Return whether current capability instance has associated overrides.
 
         Capabilities can implement this method as well as the next two
@@ -120,107 +236,271 @@ class _Capability(object):
         """
         return False
 
-    def description(self) -> Dict:
+    def bind(self, state: State, entity_config: EntityConfig) -> '_Capability':
+        """Return capability accessor for given entity.
+
+        Capabilities may resolve entity-specific behaviour once per entity
+        plan by returning a bound accessor instead of the shared instance.
+        """
+        return self
+
+    def uses_override(self, state: State, entity_config: EntityConfig) -> bool:
+        """Return whether override mechanism serves given entity."""
+        return self.has_override(state.domain, entity_config, state.attributes)
+
+    def is_retrievable(self, state: State, entity_config: EntityConfig) -> bool:
+        """Return whether capability state can be retrieved for given entity."""
+        return self.retrievable
+
+    def description(self, states: Mapping[str, State], state: State, entity_config: EntityConfig) -> Dict:
         """Return description for a devices request."""
         response = {
             'type': self.type,
-            'retrievable': self.retrievable,
+            'retrievable': self.is_retrievable(state, entity_config),
         }
-        parameters = self.parameters()
+        parameters = self.parameters(states, state, entity_config)
         if parameters is not None:
             response['parameters'] = parameters
 
         return response
 
-    def get_state(self) -> Dict:
-        """Return the state of this capability for this entity."""
+    def get_state(self, states: Mapping[str, State], state: State, entity_config: EntityConfig) -> Dict:
+        """Return the state of this capability for given entity."""
         return {
             'type': self.type,
             'state': {
                 'instance': self.instance,
-                'value': self.get_value(),
+                'value': self.get_value(states, state, entity_config),
             }
         }
 
-    def parameters(self) -> Dict:
+    def parameters(self, states: Mapping[str, State], state: State, entity_config: EntityConfig) -> Dict:
         """Return parameters for a devices request."""
-        if self.use_override:
-            return self.parameters_override()
-        return self.parameters_default()
+        if self.uses_override(state, entity_config):
+            return self.parameters_override(states, state, entity_config)
+        return self.parameters_default(states, state, entity_config)
 
-    def parameters_default(self) -> Dict[str, Any]:
+    def parameters_default(self, states: Mapping[str, State], state: State, entity_config: EntityConfig) -> Dict[str, Any]:
         raise DefaultNotImplemented(self.__class__)
 
-    def parameters_override(self) -> Dict[str, Any]:
+    def parameters_override(self, states: Mapping[str, State], state: State, entity_config: EntityConfig) -> Dict[str, Any]:
         raise OverrideNotImplemented(self.__class__)
 
-    def get_value(self) -> Any:
-        """Return the state value of this capability for this entity."""
-        if self.use_override:
-            return self.get_value_override()
-        return self.get_value_default()
+    def get_value(self, states: Mapping[str, State], state: State, entity_config: EntityConfig) -> Any:
+        """Return the state value of this capability for given entity."""
+        if self.uses_override(state, entity_config):
+            return self.get_value_override(states, state, entity_config)
+        return self.get_value_default(states, state, entity_config)
 
-    def get_value_default(self) -> Optional[Union[str, float, int]]:
-        """Return the state value of this capability for this entity using default mechanism."""
+    def get_value_default(self, states: Mapping[str, State], state: State,
+                          entity_config: EntityConfig) -> Optional[Union[str, float, int]]:
+        """Return the state value of this capability for given entity using default mechanism."""
         raise DefaultNotImplemented(self.__class__)
 
-    def get_value_override(self) -> Optional[Union[str, float, int]]:
-        """Return the state value of this capability for this entity using override."""
+    def get_value_override(self, states: Mapping[str, State], state: State,
+                           entity_config: EntityConfig) -> Optional[Union[str, float, int]]:
+        """Return the state value of this capability for given entity using override."""
         raise OverrideNotImplemented(self.__class__)
 
-    async def set_state(self, data: 'RequestData', state: Dict) -> None:
+    def get_service_call(self, state: State, entity_config: EntityConfig, action_state: Dict) -> Optional[ServiceCall]:
+        """Return service call which sets device state, when it may be merged with calls of other capabilities.
+
+        Capabilities returning None are set with `set_state`.
+        """
+        return None
+
+    async def set_state(self, hass: HomeAssistantType, state: State, entity_config: EntityConfig,
+                        data: 'RequestData', action_state: Dict) -> None:
         """Set device state."""
-        if self.use_override:
-            return await self.set_state_override(data, state)
-        return await self.set_state_default(data, state)
+        if self.uses_override(state, entity_config):
+            return await self.set_state_override(hass, state, entity_config, data, action_state)
+        return await self.set_state_default(hass, state, entity_config, data, action_state)
 
-    async def set_state_default(self, data: 'RequestData', state: Dict) -> None:
+    async def set_state_default(self, hass: HomeAssistantType, state: State, entity_config: EntityConfig,
+                                data: 'RequestData', action_state: Dict) -> None:
         """Set device state."""
         raise DefaultNotImplemented(self.__class__)
 
-    async def set_state_override(self, data: 'RequestData', state: Dict) -> None:
+    async def set_state_override(self, hass: HomeAssistantType, state: State, entity_config: EntityConfig,
+                                 data: 'RequestData', action_state: Dict) -> None:
         """Set device state using override."""
         raise OverrideNotImplemented(self.__class__)
 
 
 class _CompatibleCapability(_Capability):
-    _compatibility_configs: Sequence[_CompatibilityConfig] = NotImplemented
-    compatibility_config: _CompatibilityConfig = None
+    __slots__ = ()
 
-    def __init__(self, hass: HomeAssistantType, state: State, entity_config: Dict[str, Any]):
-        super().__init__(hass, state, entity_config)
-        attributes = state.attributes
-        self.compatibility_config = self.get_compatibility_config(
-            domain=state.domain,
-            features=attributes.get(ATTR_SUPPORTED_FEATURES, 0),
-            attributes=attributes
-        ) if not self.use_override else None
+    _compatibility_configs: _LazyDomainConfigs = NotImplemented
 
-    @property
-    def retrievable(self):
-        if self.use_override:
+    def is_retrievable(self, state: State, entity_config: EntityConfig) -> bool:
+        if self.uses_override(state, entity_config):
             return True
-        conf = self.compatibility_config
-        return (
+        conf = self.get_state_compatibility_config(state)
+        return bool(
                 conf.retrievable_feature is None
-                or self.state.attributes.get(ATTR_SUPPORTED_FEATURES, 0)
+                or state.attributes.get(ATTR_SUPPORTED_FEATURES, 0)
                 & conf.retrievable_feature
         )
 
     @classmethod
-    def supported(cls, domain: str, features: int, entity_config: Dict, attributes: Dict) -> bool:
+    def supported(cls, domain: str, features: int, entity_config: EntityConfig, attributes: Dict) -> bool:
         """Determine whether mode capability is supported."""
         return cls.get_compatibility_config(domain, features, attributes) is not None
 
     @classmethod
     def get_compatibility_config(cls, domain: str, features: int, attributes: Dict[str, Any]):
+        """Return (cached) compatibility config for given entity traits.
+
+        Resolution is shared by entities with identical traits (domain,
+        features and relevant attributes, such as modes lists).
+        """
         if cls._compatibility_configs is NotImplemented:
             return None
 
-        for config in cls._compatibility_configs:
+        key = (cls, domain, features, tuple(
+            config.get_attributes_key(attributes)
+            for config in cls._compatibility_configs.get(domain)
+        ))
+        try:
+            return _COMPATIBILITY_CONFIGS_CACHE[key]
+        except KeyError:
+            config = _COMPATIBILITY_CONFIGS_CACHE[key] = cls._resolve_compatibility_config(domain, features, attributes)
+            return config
+        except TypeError:
+            # Unhashable attribute values can not be cached
+            return cls._resolve_compatibility_config(domain, features, attributes)
+
+    @classmethod
+    def _resolve_compatibility_config(cls, domain: str, features: int, attributes: Dict[str, Any]):
+        for config in cls._compatibility_configs.get(domain):
             if config.is_compatible(domain, features, attributes):
                 return config
 
+    @classmethod
+    def get_state_compatibility_config(cls, state: State):
+        """Return compatibility config matching given entity state."""
+        attributes = state.attributes
+        return cls.get_compatibility_config(
+            domain=state.domain,
+            features=attributes.get(ATTR_SUPPORTED_FEATURES, 0),
+            attributes=attributes
+        )
+
+
+class _OnOffStrategy:
+    """On_off behaviour of a domain: state retrieval and service selection.
+
+    Strategies are resolved once per entity plan (see `OnOffCapability.bind`).
+    Fixed strategies are their own factories, so that strategy table entries
+    can be called with entity attributes uniformly.
+    """
+
+    __slots__ = ('is_on', 'service_domain', 'commands', 'blocking')
+
+    def __init__(self, is_on: Callable[[State], bool], service_domain: Optional[str] = None,
+                 turn_on: Optional[Tuple[str, Dict[str, Any]]] = (SERVICE_TURN_ON, {}),
+                 turn_off: Optional[Tuple[str, Dict[str, Any]]] = (SERVICE_TURN_OFF, {}),
+                 blocking: bool = True):
+        """
+        Initialize on_off strategy.
+        :param is_on: State retrieval predicate
+        :param service_domain: Domain of services (entity domain if None)
+        :param turn_on: Service and extra service data to turn entity on (unsupported if None)
+        :param turn_off: Service and extra service data to turn entity off (unsupported if None)
+        :param blocking: Whether to wait for service calls to complete
+        """
+        self.is_on = is_on
+        self.service_domain = service_domain
+        self.commands = (turn_off, turn_on)
+        self.blocking = blocking
+
+    def __call__(self, attributes: Mapping[str, Any]) -> '_OnOffStrategy':
+        return self
+
+    def get_service_call(self, entity_state: State, state: Dict) -> Optional[ServiceCall]:
+        """Return service call which sets state for given entity (None if command is not supported)."""
+        new_state = state['value']
+        if type(new_state) is not bool:
+            raise SmartHomeError(ERR_INVALID_VALUE, "Value is not boolean")
+
+        command = self.commands[new_state]
+        if command is None:
+            return None
+
+        service, service_data = command
+        return ServiceCall(self.service_domain or entity_state.domain, service, dict(service_data), self.blocking)
+
+    async def async_execute(self, hass: HomeAssistantType, entity_state: State, data: 'RequestData', state: Dict):
+        """Set state for given entity."""
+        service_call = self.get_service_call(entity_state, state)
+        if service_call is None:
+            _LOGGER.warning(("An '%s' command was issued via Yandex to %s. "
+                             "Please, check your configuration.") % ('on' if state['value'] else 'off',
+                                                                     entity_state.entity_id))
+            return
+
+        await service_call.async_call(hass, entity_state.entity_id, data.context)
+
+
+def _is_not_off(state: State) -> bool:
+    return state.state != STATE_OFF
+
+
+def _vacuum_on_off_strategy(attributes: Mapping[str, Any]) -> _OnOffStrategy:
+    features = attributes.get(ATTR_SUPPORTED_FEATURES, 0)
+
+    if features & vacuum.SUPPORT_START:
+        turn_on = vacuum.SERVICE_START
+    else:
+        turn_on = SERVICE_TURN_ON
+
+    if features & vacuum.SUPPORT_RETURN_HOME:
+        turn_off = vacuum.SERVICE_RETURN_TO_BASE
+    elif features & vacuum.SUPPORT_STOP:
+        turn_off = vacuum.SERVICE_STOP
+    else:
+        turn_off = SERVICE_TURN_OFF
+
+    return _OnOffStrategy(
+        lambda state: state.state == STATE_ON or state.state == vacuum.STATE_CLEANING,
+        turn_on=(turn_on, {}),
+        turn_off=(turn_off, {})
+    )
+
+
+def _water_heater_on_off_strategy(attributes: Mapping[str, Any]) -> _OnOffStrategy:
+    operation_list = attributes.get(water_heater.ATTR_OPERATION_LIST)
+    operation_on = OnOffCapability.get_water_heater_operation(STATE_ON, operation_list)
+    operation_off = OnOffCapability.get_water_heater_operation(STATE_OFF, operation_list)
+
+    return _OnOffStrategy(
+        lambda state: state.attributes.get(water_heater.ATTR_OPERATION_MODE) != operation_off,
+        turn_on=(water_heater.SERVICE_SET_OPERATION_MODE, {water_heater.ATTR_OPERATION_MODE: operation_on}),
+        turn_off=(water_heater.SERVICE_SET_OPERATION_MODE, {water_heater.ATTR_OPERATION_MODE: operation_off})
+    )
+
+
+# Domain -> on_off strategy factory (called with entity attributes)
+ON_OFF_STRATEGIES: Dict[str, Callable[[Mapping[str, Any]], _OnOffStrategy]] = {
+    group.DOMAIN: _OnOffStrategy(_is_not_off, service_domain=HA_DOMAIN),
+    cover.DOMAIN: _OnOffStrategy(
+        lambda state: state.state == cover.STATE_OPEN,
+        turn_on=(SERVICE_OPEN_COVER, {}),
+        turn_off=(SERVICE_CLOSE_COVER, {})
+    ),
+    vacuum.DOMAIN: _vacuum_on_off_strategy,
+    climate.DOMAIN: _OnOffStrategy(lambda state: state.state != climate.HVAC_MODE_OFF),
+    scene.DOMAIN: _OnOffStrategy(_is_not_off, turn_off=None),
+    script.DOMAIN: _OnOffStrategy(_is_not_off, turn_off=None, blocking=False),
+    lock.DOMAIN: _OnOffStrategy(
+        lambda state: state.state == lock.STATE_UNLOCKED,
+        turn_on=(SERVICE_UNLOCK, {}),
+        turn_off=(SERVICE_LOCK, {})
+    ),
+    water_heater.DOMAIN: _water_heater_on_off_strategy,
+}
+DEFAULT_ON_OFF_STRATEGY = _OnOffStrategy(_is_not_off)
+
 
 @register_capability
 class OnOffCapability(_Capability):
@@ -229,121 +509,50 @@ class OnOffCapability(_Capability):
     https://yandex.ru/dev/dialogs/alice/doc/smart-home/concepts/on_off-docpage/
     """
 
+    __slots__ = ()
+
     type = CAPABILITIES_ON_OFF
     instance = 'on'
 
     water_heater_operations = {
-        STATE_ON: [STATE_ON, 'On', 'ON', STATE_ELECTRIC],
+        STATE_ON: [STATE_ON, 'On', 'ON', 'electric'],  # water_heater.STATE_ELECTRIC
         STATE_OFF: [STATE_OFF, 'Off', 'OFF'],
     }
 
-    def __init__(self, hass, state, config):
-        super().__init__(hass, state, config)
-        self.retrievable = state.domain not in (scene.DOMAIN, script.DOMAIN)
+    def is_retrievable(self, state: State, entity_config: EntityConfig) -> bool:
+        return state.domain not in (scene.DOMAIN, script.DOMAIN)
 
     @classmethod
     def get_water_heater_operation(cls, required_mode, operations_list):
+        if not operations_list:
+            return None
         for operation in cls.water_heater_operations[required_mode]:
             if operation in operations_list:
                 return operation
         return None
 
+    @staticmethod
+    def get_strategy(domain: str, attributes: Mapping[str, Any]) -> _OnOffStrategy:
+        """Resolve on_off strategy for entity of given domain."""
+        return ON_OFF_STRATEGIES.get(domain, DEFAULT_ON_OFF_STRATEGY)(attributes)
+
+    def bind(self, state: State, entity_config: EntityConfig) -> '_BoundOnOffCapability':
+        return _BoundOnOffCapability(self.get_strategy(state.domain, state.attributes))
+
     @classmethod
     def issue_state_retrieval(cls, entity_state: State) -> bool:
         """Return the state value of this capability for given entity."""
-        entity_domain = entity_state.domain
-        current_state = entity_state.state
-
-        if entity_domain == cover.DOMAIN:
-            return current_state == cover.STATE_OPEN
-
-        elif entity_domain == vacuum.DOMAIN:
-            return current_state == STATE_ON or current_state == \
-                   vacuum.STATE_CLEANING
-
-        elif entity_domain == climate.DOMAIN:
-            return current_state != climate.HVAC_MODE_OFF
-
-        elif entity_domain == lock.DOMAIN:
-            return current_state == lock.STATE_UNLOCKED
-
-        elif entity_domain == water_heater.DOMAIN:
-            operation_mode = entity_state.attributes.get(water_heater.ATTR_OPERATION_MODE)
-            operation_list = entity_state.attributes.get(water_heater.ATTR_OPERATION_LIST)
-            return operation_mode != cls.get_water_heater_operation(STATE_OFF, operation_list)
-
-        return current_state != STATE_OFF
+        return cls.get_strategy(entity_state.domain, entity_state.attributes).is_on(entity_state)
 
     @classmethod
     async def issue_state_command(cls, hass: HomeAssistantType, entity_state: State, data: 'RequestData', state: Dict):
         """Set state for given entity."""
-        new_state = state['value']
-        if type(new_state) is not bool:
-            raise SmartHomeError(ERR_INVALID_VALUE, "Value is not boolean")
-
-        entity_domain = entity_state.domain
-        entity_id = entity_state.entity_id
-
-        service_domain = entity_domain
-        service_data = {
-            ATTR_ENTITY_ID: entity_id,
-        }
-        if entity_domain == group.DOMAIN:
-            service_domain = HA_DOMAIN
-            service = SERVICE_TURN_ON if new_state else SERVICE_TURN_OFF
-
-        elif entity_domain == cover.DOMAIN:
-            service = SERVICE_OPEN_COVER if new_state else \
-                SERVICE_CLOSE_COVER
-
-        elif entity_domain == vacuum.DOMAIN:
-            features = entity_state.attributes.get(ATTR_SUPPORTED_FEATURES)
-            if new_state:
-                if features & vacuum.SUPPORT_START:
-                    service = vacuum.SERVICE_START
-                else:
-                    service = SERVICE_TURN_ON
-            else:
-                if features & vacuum.SUPPORT_RETURN_HOME:
-                    service = vacuum.SERVICE_RETURN_TO_BASE
-                elif features & vacuum.SUPPORT_STOP:
-                    service = vacuum.SERVICE_STOP
-                else:
-                    service = SERVICE_TURN_OFF
-
-        elif entity_domain == scene.DOMAIN or entity_domain == script.DOMAIN:
-            if new_state is False:
-                _LOGGER.warning(("An 'off' command was issued via Yandex to %s. "
-                                 "Please, check your configuration.") % entity_id)
-                return
-            service = SERVICE_TURN_ON
-
-        elif entity_domain == lock.DOMAIN:
-            service = SERVICE_UNLOCK if new_state else \
-                SERVICE_LOCK
-
-        elif entity_domain == water_heater.DOMAIN:
-            operation_list = entity_state.attributes.get(water_heater.ATTR_OPERATION_LIST)
-            service = SERVICE_SET_OPERATION_MODE
-            if new_state:
-                service_data[water_heater.ATTR_OPERATION_MODE] = \
-                    cls.get_water_heater_operation(STATE_ON, operation_list)
-            else:
-                service_data[water_heater.ATTR_OPERATION_MODE] = \
-                    cls.get_water_heater_operation(STATE_OFF, operation_list)
-        else:
-            service = SERVICE_TURN_ON if new_state else SERVICE_TURN_OFF
-
-        await hass.services.async_call(
-            service_domain,
-            service,
-            service_data,
-            blocking=(entity_domain != script.DOMAIN),
-            context=data.context
+        await cls.get_strategy(entity_state.domain, entity_state.attributes).async_execute(
+            hass, entity_state, data, state
         )
 
     @classmethod
-    def supported(cls, domain: str, features: int, entity_config: Dict, attributes: Dict) -> bool:
+    def supported(cls, domain: str, features: int, entity_config: EntityConfig, attributes: Dict) -> bool:
         """Test if state is supported."""
         if domain == media_player.DOMAIN:
             return bool(features & media_player.SUPPORT_TURN_ON and features & media_player.SUPPORT_TURN_OFF)
@@ -376,17 +585,44 @@ class OnOffCapability(_Capability):
             lock.DOMAIN,
         )
 
-    def parameters(self):
+    def parameters(self, states: Mapping[str, State], state: State, entity_config: EntityConfig):
         """Return parameters for a devices request."""
         return None
 
-    def get_value_default(self) -> Optional[Union[str, float, int]]:
-        """Return the state value of this capability for this entity."""
-        return self.issue_state_retrieval(self.state)
+    def get_value_default(self, states: Mapping[str, State], state: State,
+                          entity_config: EntityConfig) -> Optional[Union[str, float, int]]:
+        """Return the state value of this capability for given entity."""
+        return self.issue_state_retrieval(state)
+
+    async def set_state_default(self, hass: HomeAssistantType, state: State, entity_config: EntityConfig,
+                                data: 'RequestData', action_state: Dict):
+        """Set state for given entity."""
+        await self.issue_state_command(hass, state, data, action_state)
+
+
+class _BoundOnOffCapability(OnOffCapability):
+    """On_off capability with domain strategy resolved for an entity plan."""
 
-    async def set_state_default(self, data: 'RequestData', state: Dict):
-        """Set state for this entity."""
-        await self.issue_state_command(self.hass, self.state, data, state)
+    __slots__ = ('strategy',)
+
+    def __init__(self, strategy: _OnOffStrategy):
+        self.strategy = strategy
+
+    def bind(self, state: State, entity_config: EntityConfig) -> '_BoundOnOffCapability':
+        return self
+
+    def get_value_default(self, states: Mapping[str, State], state: State,
+                          entity_config: EntityConfig) -> Optional[Union[str, float, int]]:
+        """Return the state value of this capability for given entity."""
+        return self.strategy.is_on(state)
+
+    def get_service_call(self, state: State, entity_config: EntityConfig, action_state: Dict) -> Optional[ServiceCall]:
+        return self.strategy.get_service_call(state, action_state)
+
+    async def set_state_default(self, hass: HomeAssistantType, state: State, entity_config: EntityConfig,
+                                data: 'RequestData', action_state: Dict):
+        """Set state for given entity."""
+        await self.strategy.async_execute(hass, state, data, action_state)
 
 
 class ToggleCapabilityConfig(_CompatibilityConfig):
@@ -414,33 +650,36 @@ class _ToggleCapability(_CompatibleCapability):
 
     https://yandex.ru/dev/dialogs/alice/doc/smart-home/concepts/toggle-docpage/
     """
+
+    __slots__ = ()
+
     type = CAPABILITIES_TOGGLE
 
-    _compatibility_configs: Sequence[ToggleCapabilityConfig] = NotImplemented
-    compatibility_config: ToggleCapabilityConfig = None
+    _compatibility_configs: _LazyDomainConfigs = NotImplemented
 
-    def get_value_default(self) -> Optional[Union[str, float, int]]:
-        """Return the state value of this capability for this entity."""
-        conf = self.compatibility_config
+    def get_value_default(self, states: Mapping[str, State], state: State,
+                          entity_config: EntityConfig) -> Optional[Union[str, float, int]]:
+        """Return the state value of this capability for given entity."""
+        conf = self.get_state_compatibility_config(state)
         comp_state = conf.comp_state
 
         if conf.state_attr is not None:
-            state = self.state.attributes.get(conf.state_attr)
-            if state is None:
+            attr_state = state.attributes.get(conf.state_attr)
+            if attr_state is None:
                 return False
             if comp_state is None:
-                return bool(state)
-            return (state == comp_state[0]) is comp_state[1]
-        return (self.state.state == comp_state[0]) is comp_state[1]
+                return bool(attr_state)
+            return (attr_state == comp_state[0]) is comp_state[1]
+        return (state.state == comp_state[0]) is comp_state[1]
 
-    async def set_state_default(self, data: 'RequestData', state: Dict) -> None:
+    async def set_state_default(self, hass: HomeAssistantType, state: State, entity_config: EntityConfig,
+                                data: 'RequestData', action_state: Dict) -> None:
         """Set device state."""
-        new_state = state['value']
+        new_state = action_state['value']
         if type(new_state) is not bool:
             raise SmartHomeError(ERR_INVALID_VALUE, "Value is not boolean")
 
-        state = self.state
-        conf = self.compatibility_config
+        conf = self.get_state_compatibility_config(state)
 
         # Test for attribute existence
         if conf.state_attr is not None and state.attributes.get(conf.state_attr) is None:
@@ -449,15 +688,13 @@ class _ToggleCapability(_CompatibleCapability):
 
         # Select service
         service_id = conf.service_id_on
-        service_data = {ATTR_ENTITY_ID: self.state.entity_id}
+        service_data = {ATTR_ENTITY_ID: state.entity_id}
         if conf.service_id_off is None:
             service_data[conf.state_attr] = new_state
         elif new_state is False:
             service_id = conf.service_id_off
 
-        service_data[ATTR_ENTITY_ID] = self.state.entity_id
-
-        await self.hass.services.async_call(
+        await hass.services.async_call(
             domain=state.domain,
             service=service_id,
             service_data=service_data,
@@ -467,42 +704,44 @@ class _ToggleCapability(_CompatibleCapability):
 
     # Override config
     @classmethod
-    def has_override(cls, domain: str, entity_config: Dict, attributes: Dict) -> bool:
+    def has_override(cls, domain: str, entity_config: EntityConfig, attributes: Dict) -> bool:
         """Determine whether toggle capability has an override."""
         return bool(cls.get_override_entity_id(entity_config))
 
-    def parameters(self):
+    def parameters(self, states: Mapping[str, State], state: State, entity_config: EntityConfig):
         """Return parameters for a devices request."""
         return {"instance": self.instance}
 
     @classmethod
-    def get_override_entity_id(cls, entity_config: Dict) -> Optional[str]:
+    def get_override_entity_id(cls, entity_config: EntityConfig) -> Optional[str]:
         """Return override entity ID for toggles."""
-        entity_toggles = entity_config.get(CONF_ENTITY_TOGGLES)
-        if entity_toggles:
-            return entity_toggles.get(cls.instance)
+        return entity_config.toggles.get(cls.instance)
 
     @classmethod
-    def get_override_entity_state(cls, hass: HomeAssistantType, entity_config: Dict) -> Optional[State]:
+    def get_override_entity_state(cls, states: Mapping[str, State], entity_config: EntityConfig) -> Optional[State]:
         """Get state of overriding entity."""
         entity_id = cls.get_override_entity_id(entity_config)
         if entity_id:
-            return hass.states.get(entity_id)
+            return states.get(entity_id)
 
-    def get_value_override(self) -> Optional[Union[str, float, int]]:
+    def get_value_override(self, states: Mapping[str, State], state: State,
+                           entity_config: EntityConfig) -> Optional[Union[str, float, int]]:
         """Return override value."""
-        override_entity_state = self.get_override_entity_state(self.hass, self.entity_config)
+        override_entity_state = self.get_override_entity_state(states, entity_config)
         return OnOffCapability.issue_state_retrieval(override_entity_state)
 
-    async def set_state_override(self, data: 'RequestData', state: Dict):
-        override_entity_state = self.get_override_entity_state(self.hass, self.entity_config)
-        await OnOffCapability.issue_state_command(self.hass, override_entity_state, data, state)
+    async def set_state_override(self, hass: HomeAssistantType, state: State, entity_config: EntityConfig,
+                                 data: 'RequestData', action_state: Dict):
+        override_entity_state = self.get_override_entity_state(hass.states, entity_config)
+        await OnOffCapability.issue_state_command(hass, override_entity_state, data, action_state)
 
 
 @register_capability
 class ControlsLockedCapability(_ToggleCapability):
     """Controls locking functionality."""
 
+    __slots__ = ()
+
     instance = "controls_locked"
 
 
@@ -510,6 +749,8 @@ class ControlsLockedCapability(_ToggleCapability):
 class BacklightCapability(_ToggleCapability):
     """Backlight functionality"""
 
+    __slots__ = ()
+
     instance = "backlight"
 
 
@@ -517,6 +758,8 @@ class BacklightCapability(_ToggleCapability):
 class IonizationCapability(_ToggleCapability):
     """Ionization functionality."""
 
+    __slots__ = ()
+
     instance = "ionization"
 
 
@@ -524,6 +767,8 @@ class IonizationCapability(_ToggleCapability):
 class KeepWarmCapability(_ToggleCapability):
     """Keep warm capability."""
 
+    __slots__ = ()
+
     instance = "keep_warm"
 
 
@@ -531,56 +776,70 @@ class KeepWarmCapability(_ToggleCapability):
 class MuteCapability(_ToggleCapability):
     """Mute and unmute functionality."""
 
+    __slots__ = ()
+
     instance = "mute"
 
-    _compatibility_configs = [
-        ToggleCapabilityConfig(
-            domain=media_player.DOMAIN,
-            required_feature=media_player.SUPPORT_VOLUME_MUTE,
-            state_attr=media_player.ATTR_MEDIA_VOLUME_MUTED,
-            service_id_on=media_player.SERVICE_VOLUME_MUTE,
-        )
-    ]
+    _compatibility_configs = _LazyDomainConfigs({
+        media_player.DOMAIN: lambda: [
+            ToggleCapabilityConfig(
+                domain=media_player.DOMAIN,
+                required_feature=media_player.SUPPORT_VOLUME_MUTE,
+                state_attr=media_player.ATTR_MEDIA_VOLUME_MUTED,
+                service_id_on=media_player.SERVICE_VOLUME_MUTE,
+            ),
+        ],
+    })
 
 
 @register_capability
 class OscillationCapability(_ToggleCapability):
     """Oscillation capability"""
 
+    __slots__ = ()
+
     instance = "oscillation"
 
-    _compatibility_configs = [
-        ToggleCapabilityConfig(
-            domain=fan.DOMAIN,
-            required_feature=fan.SUPPORT_OSCILLATE,
-            state_attr=fan.ATTR_OSCILLATING,
-            service_id_on=fan.ATTR_OSCILLATING,
-        )
-    ]
+    _compatibility_configs = _LazyDomainConfigs({
+        fan.DOMAIN: lambda: [
+            ToggleCapabilityConfig(
+                domain=fan.DOMAIN,
+                required_feature=fan.SUPPORT_OSCILLATE,
+                state_attr=fan.ATTR_OSCILLATING,
+                service_id_on=fan.ATTR_OSCILLATING,
+            ),
+        ],
+    })
 
 
 @register_capability
 class PauseCapability(_ToggleCapability):
     """Pause and unpause functionality."""
 
+    __slots__ = ()
+
     instance = "pause"
 
-    _compatibility_configs = [
-        ToggleCapabilityConfig(
-            domain=media_player.DOMAIN,
-            required_feature=media_player.SUPPORT_PLAY | media_player.SUPPORT_PAUSE,
-            service_id_on=media_player.SERVICE_MEDIA_PLAY,
-            service_id_off=media_player.SERVICE_MEDIA_PAUSE,
-            comp_state=(media_player.STATE_PLAYING, False),
-        ),
-        ToggleCapabilityConfig(
-            domain=vacuum.DOMAIN,
-            required_feature=vacuum.SUPPORT_PAUSE & vacuum.SUPPORT_START,
-            service_id_on=vacuum.SERVICE_START,
-            service_id_off=vacuum.SERVICE_PAUSE,
-            comp_state=(vacuum.STATE_PAUSED, True),
-        )
-    ]
+    _compatibility_configs = _LazyDomainConfigs({
+        media_player.DOMAIN: lambda: [
+            ToggleCapabilityConfig(
+                domain=media_player.DOMAIN,
+                required_feature=media_player.SUPPORT_PLAY | media_player.SUPPORT_PAUSE,
+                service_id_on=media_player.SERVICE_MEDIA_PLAY,
+                service_id_off=media_player.SERVICE_MEDIA_PAUSE,
+                comp_state=(media_player.STATE_PLAYING, False),
+            ),
+        ],
+        vacuum.DOMAIN: lambda: [
+            ToggleCapabilityConfig(
+                domain=vacuum.DOMAIN,
+                required_feature=vacuum.SUPPORT_PAUSE & vacuum.SUPPORT_START,
+                service_id_on=vacuum.SERVICE_START,
+                service_id_off=vacuum.SERVICE_PAUSE,
+                comp_state=(vacuum.STATE_PAUSED, True),
+            ),
+        ],
+    })
 
 
 class ModeCompatibilityConfig(_CompatibilityConfig):
@@ -599,16 +858,30 @@ class ModeCompatibilityConfig(_CompatibilityConfig):
         self._is_compatible = compatibility_checker
         self._default_modes_mapping = default_modes_mapping
         self.required_feature = required_feature
+        # Modes list -> default modes mapping
+        self._default_modes_mappings = _LRUCache(256)
 
     def __repr__(self):
         return '<{}[{}]>'.format(self.__class__.__name__, ', '.join([
             '{}={}'.format(k, v)
             for k, v in self.__dict__.items()
+            if k != '_default_modes_mappings'
         ]))
 
     def __str__(self):
         return self.__class__.__name__ + '(' + self.domain + ')'
 
+    def get_attributes_key(self, attributes: Dict[str, Any]) -> Hashable:
+        if self._is_compatible is not None:
+            # Custom checkers may depend on any attribute; attributes
+            # mapping itself is unhashable, so resolution is not cached.
+            return attributes
+
+        modes_list = attributes.get(self.modes_list_attr)
+        if modes_list is None:
+            return None
+        return modes_list.__class__, tuple(modes_list)
+
     def is_compatible(self, domain: str, features: int, attributes: Dict[str, Any]) -> bool:
         if domain != self.domain:
             return False
@@ -623,9 +896,19 @@ class ModeCompatibilityConfig(_CompatibilityConfig):
             return bool(set(modes_list) & self.get_default_modes_mapping(attributes).keys())
         return self._is_compatible(domain, features, attributes)
 
-    def get_default_modes_mapping(self, attributes: Dict[str, Any]) -> Dict[str, str]:
+    def get_default_modes_mapping(self, attributes: Dict[str, Any]) -> Mapping[str, str]:
         """Get default mode mapping (HA => Yandex)"""
         modes_list = attributes.get(self.modes_list_attr, [])
+        try:
+            key = (modes_list.__class__, tuple(modes_list))
+            return self._default_modes_mappings[key]
+        except KeyError:
+            mapping = self._default_modes_mappings[key] = MappingProxyType(self._build_default_modes_mapping(modes_list))
+            return mapping
+        except TypeError:
+            return self._build_default_modes_mapping(modes_list)
+
+    def _build_default_modes_mapping(self, modes_list) -> Dict[str, str]:
         if self._default_modes_mapping is None:
             return dict(zip(modes_list, MODES_NUMERIC))
         # Filter default modes mapping for given entity
@@ -646,6 +929,8 @@ class _ModeCapability(_CompatibleCapability):
     https://yandex.ru/dev/dialogs/alice/doc/smart-home/concepts/mode-docpage/
     """
 
+    __slots__ = ()
+
     type = CAPABILITIES_MODE
 
     # Yandex modes
@@ -656,70 +941,61 @@ class _ModeCapability(_CompatibleCapability):
 
     # Service with domain to call for setting new value
     # Must be implemented, unless mode is override-only
-    # (Domain, Required feature) -> Mode Compatibility Config
-    _compatibility_configs: Iterable[ModeCompatibilityConfig] = NotImplemented
-    compatibility_config: Optional[ModeCompatibilityConfig] = None
-
-    def __init__(self, hass: HomeAssistantType, state: State, entity_config: Dict):
-        """Mode capability initializer."""
-        super().__init__(hass, state, entity_config)
-        if self.use_override:
-            # Generate set script
-            override_config = self.get_override_config(entity_config)
-            self.set_script = Script(hass, override_config[CONF_SET_SCRIPT])
+    # Domain -> Mode Compatibility Configs
+    _compatibility_configs: _LazyDomainConfigs = NotImplemented
 
     # Intended for overriding
     @classmethod
-    def _get_custom_parameters_mapping(cls, entity_config: Dict):
+    def _get_custom_modes_mapping(cls, entity_config: EntityConfig) -> Optional[Mapping[str, str]]:
         """
-        Get custom modes mapping of Yandex modes to entity modes (Yandex => HA).
+        Get custom modes mapping of entity modes to Yandex modes (HA => Yandex).
         :param entity_config: Entity config
         """
         if cls.custom_modes_key is not NotImplemented:
-            custom_modes = entity_config.get(cls.custom_modes_key)
-            if isinstance(custom_modes, Mapping):
-                return dict(custom_modes)
+            return entity_config.custom_modes.get(cls.custom_modes_key)
 
     # Default implementations
-    def get_modes_mapping(self) -> Optional[Dict[str, str]]:
+    def get_modes_mapping(self, state: State, entity_config: EntityConfig) -> Optional[Mapping[str, str]]:
         """
         Get modes mapping of entity modes to Yandex modes (HA => Yandex).
         This method checks whether common custom configurations for modes
         are present, and runs default mapping fetching if otherwise.
+        :param state: Entity state
+        :param entity_config: Entity config
         :return: Mapping | None (when entity explicitly does not support this capability)
         """
-        custom_mapping = self._get_custom_parameters_mapping(self.entity_config)
+        custom_mapping = self._get_custom_modes_mapping(entity_config)
         if custom_mapping is not None:
-            # convert (Yandex => HA) to (HA => Yandex)
-            return {v: k for k, v in custom_mapping.items()}
+            return custom_mapping
 
-        return self.compatibility_config.get_default_modes_mapping(self.state.attributes)
+        return self.get_state_compatibility_config(state).get_default_modes_mapping(state.attributes)
 
-    def parameters_default(self) -> Dict[str, Any]:
+    def parameters_default(self, states: Mapping[str, State], state: State, entity_config: EntityConfig) -> Dict[str, Any]:
         """Get default parameters"""
         return {
             "instance": self.instance,
             "modes": [
                 {"value": v}
-                for v in set(self.get_modes_mapping().values())
+                for v in set(self.get_modes_mapping(state, entity_config).values())
             ]
         }
 
-    def get_value_default(self) -> Optional[str]:
-        """Return the state value of this capability for this entity."""
-        mapping = self.get_modes_mapping()
+    def get_value_default(self, states: Mapping[str, State], state: State, entity_config: EntityConfig) -> Optional[str]:
+        """Return the state value of this capability for given entity."""
+        mapping = self.get_modes_mapping(state, entity_config)
         ent_modes = list(mapping.keys())
 
-        mode_attr = self.compatibility_config.mode_attr
-        ent_mode = self.state.attributes.get(mode_attr)
+        mode_attr = self.get_state_compatibility_config(state).mode_attr
+        ent_mode = state.attributes.get(mode_attr)
         if ent_mode is None or ent_mode not in ent_modes:
             return self.internal_modes[0]
 
         return list(mapping.values())[ent_modes.index(ent_mode)]
 
-    async def set_state_default(self, data: 'RequestData', state: Dict[str, Any]) -> None:
-        mapping = self.get_modes_mapping()
-        new_mode = state["value"]
+    async def set_state_default(self, hass: HomeAssistantType, state: State, entity_config: EntityConfig,
+                                data: 'RequestData', action_state: Dict[str, Any]) -> None:
+        mapping = self.get_modes_mapping(state, entity_config)
+        new_mode = action_state["value"]
 
         yandex_modes = list(mapping.values())
 
@@ -727,13 +1003,14 @@ class _ModeCapability(_CompatibleCapability):
             raise SmartHomeError(ERR_INVALID_VALUE, "Unacceptable value")
 
         new_ent_mode = list(mapping.keys())[yandex_modes.index(new_mode)]
+        compatibility_config = self.get_state_compatibility_config(state)
 
-        await self.hass.services.async_call(
-            domain=self.state.domain,
-            service=self.compatibility_config.service_id,
+        await hass.services.async_call(
+            domain=state.domain,
+            service=compatibility_config.service_id,
             service_data={
-                ATTR_ENTITY_ID: self.state.entity_id,
-                self.compatibility_config.service_attr: new_ent_mode
+                ATTR_ENTITY_ID: state.entity_id,
+                compatibility_config.service_attr: new_ent_mode
             },
             blocking=True,
             context=data.context
@@ -741,20 +1018,18 @@ class _ModeCapability(_CompatibleCapability):
 
     # Override implementation
     @classmethod
-    def has_override(cls, domain: str, entity_config: Dict, attributes: Dict) -> bool:
+    def has_override(cls, domain: str, entity_config: EntityConfig, attributes: Dict) -> bool:
         """Determine whether mode capability has an override."""
         return bool(cls.get_override_config(entity_config))
 
     @classmethod
-    def get_override_config(cls, entity_config: Dict) -> Optional[Dict[str, Any]]:
-        """Return override entity ID for modes."""
-        modes_config = entity_config.get(CONF_ENTITY_MODES)
-        if modes_config:
-            return modes_config.get(cls.instance)
-
-    def parameters_override(self) -> Dict[str, Any]:
-        override_config = self.get_override_config(self.entity_config)
-        iterator = override_config[CONF_MAPPING].keys() if CONF_MAPPING in override_config \
+    def get_override_config(cls, entity_config: EntityConfig) -> Optional[ModeOverrideConfig]:
+        """Return override config for modes."""
+        return entity_config.modes.get(cls.instance)
+
+    def parameters_override(self, states: Mapping[str, State], state: State, entity_config: EntityConfig) -> Dict[str, Any]:
+        override_config = self.get_override_config(entity_config)
+        iterator = override_config.mapping.keys() if override_config.mapping is not None \
             else self.internal_modes
 
         return {
@@ -762,15 +1037,16 @@ class _ModeCapability(_CompatibleCapability):
             "modes": [{"value": v} for v in iterator]
         }
 
-    def get_value_override(self) -> Optional[Union[str, float, int]]:
-        override_config = self.get_override_config(self.entity_config)
+    def get_value_override(self, states: Mapping[str, State], state: State,
+                           entity_config: EntityConfig) -> Optional[Union[str, float, int]]:
+        override_config = self.get_override_config(entity_config)
 
-        override_entity_state = self.hass.states.get(override_config[CONF_ENTITY_ID])
+        override_entity_state = states.get(override_config.entity_id)
         if override_entity_state:
-            if CONF_MAPPING in override_config:
-                for yandex_mode, states in override_config[CONF_MAPPING]:
-                    if override_entity_state.state in states:
-                        return yandex_mode
+            if override_config.mapping is not None:
+                yandex_mode = override_config.state_modes.get(override_entity_state.state)
+                if yandex_mode is not None:
+                    return yandex_mode
 
             elif override_entity_state.state in self.internal_modes:
                 return override_entity_state.state
@@ -783,18 +1059,21 @@ class _ModeCapability(_CompatibleCapability):
 
         return self.internal_modes[0]
 
-    async def set_state_override(self, data: 'RequestData', state: Dict):
-        override_config = self.get_override_config(self.entity_config)
-        value = state['value']
+    async def set_state_override(self, hass: HomeAssistantType, state: State, entity_config: EntityConfig,
+                                 data: 'RequestData', action_state: Dict):
+        override_config = self.get_override_config(entity_config)
+        value = action_state['value']
 
-        if CONF_MAPPING in override_config:
-            if value not in override_config:
+        mapping = override_config.mapping
+        if mapping is not None:
+            if value not in mapping:
                 raise SmartHomeError(ERR_INVALID_VALUE, msg="Unsupported mode")
-            value = override_config[value][0]
+            value = mapping[value][0]
 
-        await self.set_script.async_run({
+        set_script = Script(hass, override_config.set_script)
+        await set_script.async_run({
             ATTR_VALUE: value,
-            ATTR_ENTITY_ID: override_config[CONF_ENTITY_ID]
+            ATTR_ENTITY_ID: override_config.entity_id
         }, context=data.context)
 
 
@@ -802,121 +1081,145 @@ class _ModeCapability(_CompatibleCapability):
 class ProgramCapability(_ModeCapability):
     """Program functionality."""
 
+    __slots__ = ()
+
     instance = "program"
     custom_modes_key = CONF_PROGRAMS
     internal_modes = MODES_NUMERIC
 
-    _compatibility_configs = [
-        ModeCompatibilityConfig(
-            domain=climate.DOMAIN,
-            mode_attr=climate.ATTR_PRESET_MODE,
-            modes_list_attr=climate.ATTR_PRESET_MODES,
-            service_id=climate.SERVICE_SET_PRESET_MODE,
-            required_feature=climate.SUPPORT_PRESET_MODE,
-        ),
-        ModeCompatibilityConfig(
-            domain=light.DOMAIN,
-            mode_attr=light.ATTR_EFFECT,
-            modes_list_attr=light.ATTR_EFFECT_LIST,
-            service_id=light.SERVICE_TURN_ON,
-            required_feature=light.SUPPORT_EFFECT,
-        ),
-    ]
+    _compatibility_configs = _LazyDomainConfigs({
+        climate.DOMAIN: lambda: [
+            ModeCompatibilityConfig(
+                domain=climate.DOMAIN,
+                mode_attr=climate.ATTR_PRESET_MODE,
+                modes_list_attr=climate.ATTR_PRESET_MODES,
+                service_id=climate.SERVICE_SET_PRESET_MODE,
+                required_feature=climate.SUPPORT_PRESET_MODE,
+            ),
+        ],
+        light.DOMAIN: lambda: [
+            ModeCompatibilityConfig(
+                domain=light.DOMAIN,
+                mode_attr=light.ATTR_EFFECT,
+                modes_list_attr=light.ATTR_EFFECT_LIST,
+                service_id=light.SERVICE_TURN_ON,
+                required_feature=light.SUPPORT_EFFECT,
+            ),
+        ],
+    })
 
 
 @register_capability
 class InputSourceCapability(_ModeCapability):
     """Input Source functionality"""
 
+    __slots__ = ()
+
     instance = "input_source"
     custom_modes_key = CONF_INPUT_SOURCES
     internal_modes = MODES_NUMERIC
 
-    _compatibility_configs = [
-        ModeCompatibilityConfig(
-            domain=media_player.DOMAIN,
-            mode_attr=media_player.ATTR_INPUT_SOURCE,
-            modes_list_attr=media_player.ATTR_INPUT_SOURCE_LIST,
-            service_id=media_player.SERVICE_SELECT_SOURCE,
-            required_feature=media_player.SUPPORT_SELECT_SOURCE,
-        ),
-    ]
+    _compatibility_configs = _LazyDomainConfigs({
+        media_player.DOMAIN: lambda: [
+            ModeCompatibilityConfig(
+                domain=media_player.DOMAIN,
+                mode_attr=media_player.ATTR_INPUT_SOURCE,
+                modes_list_attr=media_player.ATTR_INPUT_SOURCE_LIST,
+                service_id=media_player.SERVICE_SELECT_SOURCE,
+                required_feature=media_player.SUPPORT_SELECT_SOURCE,
+            ),
+        ],
+    })
 
 
 @register_capability
 class ThermostatCapability(_ModeCapability):
     """Thermostat functionality"""
 
+    __slots__ = ()
+
     instance = 'thermostat'
     internal_modes = ('auto', 'cool', 'dry', 'fan_only', 'heat', 'preheat')
 
-    _compatibility_configs = {
-        ModeCompatibilityConfig(
-            domain=climate.DOMAIN,
-            mode_attr=climate.ATTR_HVAC_MODE,
-            modes_list_attr=climate.ATTR_HVAC_MODES,
-            service_id=climate.SERVICE_SET_HVAC_MODE,
-            default_modes_mapping={
-                climate.const.HVAC_MODE_AUTO: internal_modes[0],
-                climate.const.HVAC_MODE_COOL: internal_modes[1],
-                climate.const.HVAC_MODE_DRY: internal_modes[2],
-                climate.const.HVAC_MODE_FAN_ONLY: internal_modes[3],
-                climate.const.HVAC_MODE_HEAT: internal_modes[4],
-            }
-        )
-    }
+    _compatibility_configs = _LazyDomainConfigs({
+        climate.DOMAIN: lambda: [
+            ModeCompatibilityConfig(
+                domain=climate.DOMAIN,
+                mode_attr=climate.ATTR_HVAC_MODE,
+                modes_list_attr=climate.ATTR_HVAC_MODES,
+                service_id=climate.SERVICE_SET_HVAC_MODE,
+                default_modes_mapping={
+                    climate.const.HVAC_MODE_AUTO: ThermostatCapability.internal_modes[0],
+                    climate.const.HVAC_MODE_COOL: ThermostatCapability.internal_modes[1],
+                    climate.const.HVAC_MODE_DRY: ThermostatCapability.internal_modes[2],
+                    climate.const.HVAC_MODE_FAN_ONLY: ThermostatCapability.internal_modes[3],
+                    climate.const.HVAC_MODE_HEAT: ThermostatCapability.internal_modes[4],
+                }
+            ),
+        ],
+    })
 
 @register_capability
 class FanSpeedCapability(_ModeCapability):
     """Fan speed functionality."""
 
+    __slots__ = ()
+
     instance = 'fan_speed'
     internal_modes = ("auto", "low", "medium", "high", "turbo")
 
-    __default_modes_mapping = {m: k for k, v in {
+    _default_modes_mapping = {m: k for k, v in {
         internal_modes[0]: ['auto', 'Automatic'],
         internal_modes[1]: ['low', 'min', 'minimum', 'Quiet', 'silent'],
         internal_modes[2]: ['medium', 'middle'],
         internal_modes[3]: ['favorite', 'high', 'max', 'Max', 'maximum', 'strong'],
     }.items() for m in v}
 
-    _compatibility_configs = {
-        ModeCompatibilityConfig(
-            domain=fan.DOMAIN,
-            mode_attr=fan.ATTR_SPEED,
-            modes_list_attr=fan.ATTR_SPEED_LIST,
-            service_id=fan.SERVICE_SET_SPEED,
-            required_feature=fan.SUPPORT_SET_SPEED,
-            default_modes_mapping=__default_modes_mapping,
-        ),
-        ModeCompatibilityConfig(
-            domain=climate.DOMAIN,
-            mode_attr=climate.ATTR_FAN_MODE,
-            modes_list_attr=climate.ATTR_FAN_MODES,
-            service_id=climate.SERVICE_SET_FAN_MODE,
-            required_feature=climate.SUPPORT_FAN_MODE,
-            default_modes_mapping=__default_modes_mapping,
-        ),
-        ModeCompatibilityConfig(
-            domain=vacuum.DOMAIN,
-            mode_attr=vacuum.ATTR_FAN_SPEED,
-            modes_list_attr=vacuum.ATTR_FAN_SPEED_LIST,
-            service_id=vacuum.SERVICE_SET_FAN_SPEED,
-            required_feature=vacuum.SUPPORT_FAN_SPEED,
-            default_modes_mapping=__default_modes_mapping,
-        ),
-    }
+    _compatibility_configs = _LazyDomainConfigs({
+        fan.DOMAIN: lambda: [
+            ModeCompatibilityConfig(
+                domain=fan.DOMAIN,
+                mode_attr=fan.ATTR_SPEED,
+                modes_list_attr=fan.ATTR_SPEED_LIST,
+                service_id=fan.SERVICE_SET_SPEED,
+                required_feature=fan.SUPPORT_SET_SPEED,
+                default_modes_mapping=FanSpeedCapability._default_modes_mapping,
+            ),
+        ],
+        climate.DOMAIN: lambda: [
+            ModeCompatibilityConfig(
+                domain=climate.DOMAIN,
+                mode_attr=climate.ATTR_FAN_MODE,
+                modes_list_attr=climate.ATTR_FAN_MODES,
+                service_id=climate.SERVICE_SET_FAN_MODE,
+                required_feature=climate.SUPPORT_FAN_MODE,
+                default_modes_mapping=FanSpeedCapability._default_modes_mapping,
+            ),
+        ],
+        vacuum.DOMAIN: lambda: [
+            ModeCompatibilityConfig(
+                domain=vacuum.DOMAIN,
+                mode_attr=vacuum.ATTR_FAN_SPEED,
+                modes_list_attr=vacuum.ATTR_FAN_SPEED_LIST,
+                service_id=vacuum.SERVICE_SET_FAN_SPEED,
+                required_feature=vacuum.SUPPORT_FAN_SPEED,
+                default_modes_mapping=FanSpeedCapability._default_modes_mapping,
+            ),
+        ],
+    })
 
 
 @register_capability
 class CleanupModeCapability(_ModeCapability):
     """Cleanup mode functionality."""
 
+    __slots__ = ()
+
     instance = "cleanup_mode"
     internal_modes = ("auto", "eco", "express", "normal", "quiet")
 
     @classmethod
-    def supported(cls, domain: str, features: int, entity_config: Dict, attributes: Dict) -> bool:
+    def supported(cls, domain: str, features: int, entity_config: EntityConfig, attributes: Dict) -> bool:
         return False
 
 
@@ -924,24 +1227,28 @@ class CleanupModeCapability(_ModeCapability):
 class SwingCapability(_ModeCapability):
     """Swing capability"""
 
+    __slots__ = ()
+
     instance = "swing"
     internal_modes = ("auto", "horizontal", "stationary", "vertical")
 
-    _compatibility_configs = [
-        ModeCompatibilityConfig(
-            domain=climate.DOMAIN,
-            mode_attr=climate.ATTR_SWING_MODE,
-            modes_list_attr=climate.ATTR_SWING_MODES,
-            service_id=climate.SERVICE_SET_SWING_MODE,
-            required_feature=climate.SUPPORT_SWING_MODE,
-            default_modes_mapping={
-                climate.const.SWING_BOTH: internal_modes[0],
-                climate.const.SWING_HORIZONTAL: internal_modes[1],
-                climate.const.SWING_OFF: internal_modes[2],
-                climate.const.SWING_VERTICAL: internal_modes[3],
-            },
-        ),
-    ]
+    _compatibility_configs = _LazyDomainConfigs({
+        climate.DOMAIN: lambda: [
+            ModeCompatibilityConfig(
+                domain=climate.DOMAIN,
+                mode_attr=climate.ATTR_SWING_MODE,
+                modes_list_attr=climate.ATTR_SWING_MODES,
+                service_id=climate.SERVICE_SET_SWING_MODE,
+                required_feature=climate.SUPPORT_SWING_MODE,
+                default_modes_mapping={
+                    climate.const.SWING_BOTH: SwingCapability.internal_modes[0],
+                    climate.const.SWING_HORIZONTAL: SwingCapability.internal_modes[1],
+                    climate.const.SWING_OFF: SwingCapability.internal_modes[2],
+                    climate.const.SWING_VERTICAL: SwingCapability.internal_modes[3],
+                },
+            ),
+        ],
+    })
 
 
 class _RangeCapability(_Capability):
@@ -951,38 +1258,37 @@ class _RangeCapability(_Capability):
     https://yandex.ru/dev/dialogs/alice/doc/smart-home/concepts/range-docpage/
     """
 
+    __slots__ = ()
+
     type = CAPABILITIES_RANGE
     unit: Optional[str] = NotImplemented
     retrievable = True
 
-    @property
-    def min_max_precision(self) -> Optional[Tuple[Union[int, float], Union[int, float], Union[int, float]]]:
+    def min_max_precision(self, state: State, entity_config: EntityConfig) \
+            -> Optional[Tuple[Union[int, float], Union[int, float], Union[int, float]]]:
         return None
 
-    @property
-    def random_access(self) -> bool:
+    def random_access(self, state: State, entity_config: EntityConfig) -> bool:
         return True
 
     @classmethod
-    def has_override(cls, domain: str, entity_config: Dict, attributes: Dict) -> bool:
+    def has_override(cls, domain: str, entity_config: EntityConfig, attributes: Dict) -> bool:
         """Determine whether mode capability has an override."""
         return bool(cls.get_override_config(entity_config))
 
     @classmethod
-    def get_override_config(cls, entity_config: Dict) -> Optional[Dict[str, Any]]:
-        """Return override entity ID for modes."""
-        modes_config = entity_config.get(CONF_ENTITY_RANGES)
-        if modes_config:
-            return modes_config.get(cls.instance)
+    def get_override_config(cls, entity_config: EntityConfig) -> Optional[RangeOverrideConfig]:
+        """Return override config for ranges."""
+        return entity_config.ranges.get(cls.instance)
 
-    def parameters_default(self) -> Dict[str, Any]:
+    def parameters_default(self, states: Mapping[str, State], state: State, entity_config: EntityConfig) -> Dict[str, Any]:
         """Return parameters for a devices request."""
         parameters = {
             "instance": self.instance,
-            "random_access": self.random_access,
+            "random_access": self.random_access(state, entity_config),
         }
 
-        min_max_precision = self.min_max_precision
+        min_max_precision = self.min_max_precision(state, entity_config)
         if min_max_precision is not None:
             parameters['range'] = dict(zip(['min', 'max', 'precision'], min_max_precision))
 
@@ -991,16 +1297,16 @@ class _RangeCapability(_Capability):
 
         return parameters
 
-    def parameters_override(self) -> Dict[str, Any]:
-        override_config = self.get_override_config(self.entity_config)
+    def parameters_override(self, states: Mapping[str, State], state: State, entity_config: EntityConfig) -> Dict[str, Any]:
+        override_config = self.get_override_config(entity_config)
 
         parameters = {
             "instance": self.instance,
             "random_access": True,
             "range": {
-                "max": override_config[CONF_MAXIMUM],
-                "min": override_config[CONF_MINIMUM],
-                "precision": override_config[CONF_PRECISION],
+                "max": override_config.maximum,
+                "min": override_config.minimum,
+                "precision": override_config.precision,
             }
         }
 
@@ -1009,31 +1315,33 @@ class _RangeCapability(_Capability):
 
         return parameters
 
-    def get_value_override(self) -> Optional[Union[str, float, int]]:
-        override_config = self.get_override_config(self.entity_config)
+    def get_value_override(self, states: Mapping[str, State], state: State,
+                           entity_config: EntityConfig) -> Optional[Union[str, float, int]]:
+        override_config = self.get_override_config(entity_config)
 
-        override_entity_state = self.hass.states.get(override_config[CONF_ENTITY_ID])
+        override_entity_state = states.get(override_config.entity_id)
         if override_entity_state:
             try:
-                source_state = float(override_entity_state)
+                source_state = float(override_entity_state.state)
 
             except ValueError:
                 source_state = 0
 
-            value = source_state / override_config[CONF_MULTIPLIER]
+            value = source_state / override_config.multiplier
 
-            return min(override_config[CONF_MAXIMUM], max(override_config[CONF_MINIMUM], value))
+            return min(override_config.maximum, max(override_config.minimum, value))
 
-        return override_config[CONF_MINIMUM]
+        return override_config.minimum
 
-    async def set_state_override(self, data: 'RequestData', state: Dict):
-        override_config = self.get_override_config(self.entity_config)
-        value = float(state['value']) * override_config[CONF_MULTIPLIER]
-        script_object = Script(self.hass, override_config[CONF_SET_SCRIPT])
+    async def set_state_override(self, hass: HomeAssistantType, state: State, entity_config: EntityConfig,
+                                 data: 'RequestData', action_state: Dict):
+        override_config = self.get_override_config(entity_config)
+        value = float(action_state['value']) * override_config.multiplier
+        script_object = Script(hass, override_config.set_script)
 
         await script_object.async_run({
             'value': value,
-            'entity_id': override_config[CONF_ENTITY_ID]
+            'entity_id': override_config.entity_id
         }, context=data.context)
 
 
@@ -1041,6 +1349,8 @@ class _RangeCapability(_Capability):
 class HumidityCapability(_RangeCapability):
     """Set humidity functionality."""
 
+    __slots__ = ()
+
     instance = 'humidity'
     unit = "unit.percent"
 
@@ -1052,87 +1362,91 @@ class HumidityCapability(_RangeCapability):
     ATTR_MAX_HUMIDITY = "max_humidity"
     SERVICE_PARAMS = "service_config"
 
-    supported_humidifiers = {
-        climate.DOMAIN: [
+    supported_humidifiers = _LazyDomainConfigs({
+        climate.DOMAIN: lambda: [
             {  # Default entity support
-                ATTR_TARGET_HUMIDITY: climate.ATTR_HUMIDITY,
-                ATTR_CURRENT_HUMIDITY: climate.ATTR_CURRENT_HUMIDITY,
-                ATTR_SERVICE_SET_HUMIDITY: (climate.DOMAIN, climate.SERVICE_SET_HUMIDITY),
-                ATTR_MIN_HUMIDITY: climate.ATTR_MIN_HUMIDITY,
-                ATTR_MAX_HUMIDITY: climate.ATTR_MAX_HUMIDITY,
-                ATTR_HUMIDITY_STEP: 1,
-                SERVICE_PARAMS: lambda humidity: {climate.ATTR_HUMIDITY: humidity}
+                HumidityCapability.ATTR_TARGET_HUMIDITY: climate.ATTR_HUMIDITY,
+                HumidityCapability.ATTR_CURRENT_HUMIDITY: climate.ATTR_CURRENT_HUMIDITY,
+                HumidityCapability.ATTR_SERVICE_SET_HUMIDITY: (climate.DOMAIN, climate.SERVICE_SET_HUMIDITY),
+                HumidityCapability.ATTR_MIN_HUMIDITY: climate.ATTR_MIN_HUMIDITY,
+                HumidityCapability.ATTR_MAX_HUMIDITY: climate.ATTR_MAX_HUMIDITY,
+                HumidityCapability.ATTR_HUMIDITY_STEP: 1,
+                HumidityCapability.SERVICE_PARAMS: lambda humidity: {climate.ATTR_HUMIDITY: humidity}
             }
         ],
-    }
+    })
 
-    def __init__(self, hass: HomeAssistantType, state: State, entity_config):
-        super().__init__(hass, state, entity_config)
+    @classmethod
+    def _get_access_parameters(cls, domain: str, attributes: Dict[str, Any]) -> Optional[dict]:
+        for attr_config in cls.supported_humidifiers.get(domain):
+            if all([attr_config[a] in attributes for a in [cls.ATTR_CURRENT_HUMIDITY, cls.ATTR_TARGET_HUMIDITY]]):
+                return attr_config
 
-        parameters = self._get_access_parameters(state.domain, state.attributes)
+    @classmethod
+    def _get_state_access_parameters(cls, state: State) -> dict:
+        parameters = cls._get_access_parameters(state.domain, state.attributes)
         if parameters is None:
-            raise ValueError('Unsupported entity state')
-
-        domain, attributes = parameters
-        self._service_domain = domain
-        self._attrs = attributes
+            raise SmartHomeError(ERR_NOT_SUPPORTED_IN_CURRENT_MODE, 'Unsupported entity state')
+        return parameters
 
     @classmethod
-    def _get_access_parameters(cls, domain: str, attributes: Dict[str, Any]) -> Optional[dict]:
-        access_parameters = cls.supported_humidifiers.get(domain)
-        if access_parameters:
-            for attr_config in access_parameters:
-                if all([attr_config[a] in attributes for a in [cls.ATTR_CURRENT_HUMIDITY, cls.ATTR_TARGET_HUMIDITY]]):
-                    return attr_config
-
-    def _get_entity_attribute(self, attribute_type: str):
+    def _get_entity_attribute(cls, state: State, attribute_type: str):
         """
         Get attribute from skimmed entity attributes.
+        :param state: Entity state
         :param attribute_type: Attribute from supported attributes
         :return:
         """
-        return self.state.attributes.get(self._attrs[attribute_type])
+        return state.attributes.get(cls._get_state_access_parameters(state)[attribute_type])
 
-    @property
-    def min_max_precision(self) -> Tuple[Union[int, float], Union[int, float], Union[int, float]]:
+    def min_max_precision(self, state: State, entity_config: EntityConfig) \
+            -> Tuple[Union[int, float], Union[int, float], Union[int, float]]:
         """Return min / max / precision values."""
         return (
-            self._get_entity_attribute(self.ATTR_MIN_HUMIDITY),
-            self._get_entity_attribute(self.ATTR_MAX_HUMIDITY),
-            self._get_entity_attribute(self.ATTR_HUMIDITY_STEP)
+            self._get_entity_attribute(state, self.ATTR_MIN_HUMIDITY),
+            self._get_entity_attribute(state, self.ATTR_MAX_HUMIDITY),
+            self._get_state_access_parameters(state)[self.ATTR_HUMIDITY_STEP]
         )
 
     @classmethod
-    def supported(cls, domain: str, features: int, entity_config: Dict, attributes: Dict) -> bool:
+    def supported(cls, domain: str, features: int, entity_config: EntityConfig, attributes: Dict) -> bool:
         """Test if state is supported."""
         return bool(cls._get_access_parameters(domain, attributes))
 
-    def get_value_default(self) -> Optional[Union[str, float, int]]:
-        return self._get_entity_attribute(self.ATTR_CURRENT_HUMIDITY)
+    def get_value_default(self, states: Mapping[str, State], state: State,
+                          entity_config: EntityConfig) -> Optional[Union[str, float, int]]:
+        return self._get_entity_attribute(state, self.ATTR_CURRENT_HUMIDITY)
 
-    async def set_state_default(self, data: 'RequestData', state: Dict) -> None:
+    async def set_state_default(self, hass: HomeAssistantType, state: State, entity_config: EntityConfig,
+                                data: 'RequestData', action_state: Dict) -> None:
         """
         Set target humidity (default variant).
+        :param hass: HomeAssistant object
+        :param state: Entity state
+        :param entity_config: Entity config
         :param data: Request data
-        :param state: Requested state
+        :param action_state: Requested state
         """
-        domain, service = self._attrs[climate.SERVICE_SET_HUMIDITY]
+        attrs = self._get_state_access_parameters(state)
+        domain, service = attrs[self.ATTR_SERVICE_SET_HUMIDITY]
 
-        service_params = {ATTR_ENTITY_ID: self.state.entity_id}
-        service_params.update(self._attrs[self.SERVICE_PARAMS](state['value']))
+        service_params = {ATTR_ENTITY_ID: state.entity_id}
+        service_params.update(attrs[self.SERVICE_PARAMS](action_state['value']))
 
-        self.hass.services.async_call(domain, service, service_params, blocking=True, context=data.context)
+        await hass.services.async_call(domain, service, service_params, blocking=True, context=data.context)
 
 
 @register_capability
 class TemperatureCapability(_RangeCapability):
     """Set temperature functionality."""
 
+    __slots__ = ()
+
     instance = 'temperature'
     unit = "unit.temperature.celsius"
 
     @classmethod
-    def supported(cls, domain: str, features: int, entity_config: Dict, attributes: Dict) -> bool:
+    def supported(cls, domain: str, features: int, entity_config: EntityConfig, attributes: Dict) -> bool:
         """Test if state is supported."""
         if domain == water_heater.DOMAIN:
             return features & water_heater.SUPPORT_TARGET_TEMPERATURE
@@ -1142,53 +1456,54 @@ class TemperatureCapability(_RangeCapability):
 
         return False
 
-    @property
-    def min_max_precision(self):
-        if self.state.domain == water_heater.DOMAIN:
-            min_temp = self.state.attributes.get(water_heater.ATTR_MIN_TEMP)
-            max_temp = self.state.attributes.get(water_heater.ATTR_MAX_TEMP)
-        elif self.state.domain == climate.DOMAIN:
-            min_temp = self.state.attributes.get(climate.ATTR_MIN_TEMP)
-            max_temp = self.state.attributes.get(climate.ATTR_MAX_TEMP)
+    def min_max_precision(self, state: State, entity_config: EntityConfig):
+        if state.domain == water_heater.DOMAIN:
+            min_temp = state.attributes.get(water_heater.ATTR_MIN_TEMP)
+            max_temp = state.attributes.get(water_heater.ATTR_MAX_TEMP)
+        elif state.domain == climate.DOMAIN:
+            min_temp = state.attributes.get(climate.ATTR_MIN_TEMP)
+            max_temp = state.attributes.get(climate.ATTR_MAX_TEMP)
         else:
             min_temp = 0
             max_temp = 100
 
         return min_temp, max_temp, 0.5
 
-    def get_value_default(self) -> Optional[Union[str, float, int]]:
+    def get_value_default(self, states: Mapping[str, State], state: State,
+                          entity_config: EntityConfig) -> Optional[Union[str, float, int]]:
         """Return the state value of this capability for this entity."""
         temperature = None
-        if self.state.domain == water_heater.DOMAIN:
-            temperature = self.state.attributes.get(water_heater.ATTR_TEMPERATURE)
+        if state.domain == water_heater.DOMAIN:
+            temperature = state.attributes.get(water_heater.ATTR_TEMPERATURE)
 
-        elif self.state.domain == climate.DOMAIN:
-            temperature = self.state.attributes.get(climate.ATTR_TEMPERATURE)
+        elif state.domain == climate.DOMAIN:
+            temperature = state.attributes.get(climate.ATTR_TEMPERATURE)
 
         if temperature is None:
             return 0
 
         return float(temperature)
 
-    async def set_state_default(self, data: 'RequestData', state: Dict) -> None:
+    async def set_state_default(self, hass: HomeAssistantType, state: State, entity_config: EntityConfig,
+                                data: 'RequestData', action_state: Dict) -> None:
         """Set device state."""
 
-        if self.state.domain == water_heater.DOMAIN:
+        if state.domain == water_heater.DOMAIN:
             service = water_heater.SERVICE_SET_TEMPERATURE
             attr = water_heater.ATTR_TEMPERATURE
 
-        elif self.state.domain == climate.DOMAIN:
+        elif state.domain == climate.DOMAIN:
             service = climate.SERVICE_SET_TEMPERATURE
             attr = climate.ATTR_TEMPERATURE
 
         else:
             raise SmartHomeError(ERR_INVALID_VALUE, "Unsupported domain")
 
-        await self.hass.services.async_call(
-            self.state.domain,
+        await hass.services.async_call(
+            state.domain,
             service, {
-                ATTR_ENTITY_ID: self.state.entity_id,
-                attr: state['value']
+                ATTR_ENTITY_ID: state.entity_id,
+                attr: action_state['value']
             }, blocking=True, context=data.context)
 
 
@@ -1196,96 +1511,99 @@ class TemperatureCapability(_RangeCapability):
 class BrightnessCapability(_RangeCapability):
     """Set brightness functionality."""
 
+    __slots__ = ()
+
     instance = 'brightness'
     unit = "unit.percent"
 
     @classmethod
-    def supported(cls, domain: str, features: int, entity_config: Dict, attributes: Dict) -> bool:
+    def supported(cls, domain: str, features: int, entity_config: EntityConfig, attributes: Dict) -> bool:
         """Test if state is supported."""
         return domain == light.DOMAIN and features & light.SUPPORT_BRIGHTNESS
 
-    @property
-    def min_max_precision(self) -> Tuple[Union[int, float], Union[int, float], Union[int, float]]:
+    def min_max_precision(self, state: State, entity_config: EntityConfig) \
+            -> Tuple[Union[int, float], Union[int, float], Union[int, float]]:
         return 0, 100, 1
 
-    def get_value_default(self) -> Optional[Union[str, float, int]]:
+    def get_value_default(self, states: Mapping[str, State], state: State,
+                          entity_config: EntityConfig) -> Optional[Union[str, float, int]]:
         """Return the state value of this capability for this entity."""
-        brightness = self.state.attributes.get(light.ATTR_BRIGHTNESS)
+        brightness = state.attributes.get(light.ATTR_BRIGHTNESS)
         if brightness is None:
             return 0
 
         return int(100 * (brightness / 255))
 
-    async def set_state_default(self, data: 'RequestData', state: Dict):
+    def get_service_call(self, state: State, entity_config: EntityConfig, action_state: Dict) -> Optional[ServiceCall]:
+        if self.uses_override(state, entity_config):
+            return None
+        return ServiceCall(light.DOMAIN, light.SERVICE_TURN_ON, {light.ATTR_BRIGHTNESS_PCT: action_state['value']})
+
+    async def set_state_default(self, hass: HomeAssistantType, state: State, entity_config: EntityConfig,
+                                data: 'RequestData', action_state: Dict):
         """Set device state."""
-        await self.hass.services.async_call(
-            light.DOMAIN,
-            light.SERVICE_TURN_ON, {
-                ATTR_ENTITY_ID: self.state.entity_id,
-                light.ATTR_BRIGHTNESS_PCT: state['value']
-            }, blocking=True, context=data.context)
+        await self.get_service_call(state, entity_config, action_state).async_call(
+            hass, state.entity_id, data.context)
 
 
 @register_capability
 class VolumeCapability(_RangeCapability):
     """Set volume functionality."""
 
+    __slots__ = ()
+
     instance = 'volume'
     unit = None
 
-    def __init__(self, hass: HomeAssistantType, state: State, entity_config: Dict[str, Any]):
-        super().__init__(hass, state, entity_config)
-        features = self.state.attributes.get(ATTR_SUPPORTED_FEATURES, 0)
-        self.retrievable = (
-                self.has_override(state.domain, entity_config, state.attributes)
-                or features & media_player.SUPPORT_VOLUME_SET != 0
-        )
+    def is_retrievable(self, state: State, entity_config: EntityConfig) -> bool:
+        features = state.attributes.get(ATTR_SUPPORTED_FEATURES, 0)
+        return self.uses_override(state, entity_config) or features & media_player.SUPPORT_VOLUME_SET != 0
 
     @classmethod
-    def supported(cls, domain: str, features: int, entity_config: Dict, attributes: Dict) -> bool:
+    def supported(cls, domain: str, features: int, entity_config: EntityConfig, attributes: Dict) -> bool:
         """Test if state is supported."""
         return bool(domain == media_player.DOMAIN and features & media_player.SUPPORT_VOLUME_STEP)
 
-    @property
-    def random_access(self) -> bool:
-        return not self.is_relative_volume_only()
+    def random_access(self, state: State, entity_config: EntityConfig) -> bool:
+        return not self.is_relative_volume_only(state, entity_config)
 
-    @property
-    def min_max_precision(self) -> Tuple[Union[int, float], Union[int, float], Union[int, float]]:
-        return None if self.is_relative_volume_only() else (0, 100, 1)
+    def min_max_precision(self, state: State, entity_config: EntityConfig) \
+            -> Tuple[Union[int, float], Union[int, float], Union[int, float]]:
+        return None if self.is_relative_volume_only(state, entity_config) else (0, 100, 1)
 
-    def is_relative_volume_only(self):
-        return not self.retrievable or self.entity_config.get(
-            CONF_RELATIVE_VOLUME_ONLY)
+    def is_relative_volume_only(self, state: State, entity_config: EntityConfig):
+        return not self.is_retrievable(state, entity_config) or entity_config.relative_volume_only
 
-    def get_value_default(self) -> Optional[Union[str, float, int]]:
+    def get_value_default(self, states: Mapping[str, State], state: State,
+                          entity_config: EntityConfig) -> Optional[Union[str, float, int]]:
         """Return the state value of this capability for this entity."""
-        level = self.state.attributes.get(
+        level = state.attributes.get(
             media_player.ATTR_MEDIA_VOLUME_LEVEL)
         if level is None:
             return 0
         else:
             return int(level * 100)
 
-    async def set_state_default(self, data: 'RequestData', state: Dict):
+    async def set_state_default(self, hass: HomeAssistantType, state: State, entity_config: EntityConfig,
+                                data: 'RequestData', action_state: Dict):
         """Set device state."""
-        if self.is_relative_volume_only():
-            if state['value'] > 0:
+        if self.is_relative_volume_only(state, entity_config):
+            if action_state['value'] > 0:
                 service = media_player.SERVICE_VOLUME_UP
             else:
                 service = media_player.SERVICE_VOLUME_DOWN
-            await self.hass.services.async_call(
+            await hass.services.async_call(
                 media_player.DOMAIN,
                 service, {
-                    ATTR_ENTITY_ID: self.state.entity_id
+                    ATTR_ENTITY_ID: state.entity_id
                 }, blocking=True, context=data.context)
         else:
-            await self.hass.services.async_call(
+            await hass.services.async_call(
                 media_player.DOMAIN,
                 media_player.SERVICE_VOLUME_SET, {
-                    ATTR_ENTITY_ID: self.state.entity_id,
+                    ATTR_ENTITY_ID: state.entity_id,
                     media_player.const.ATTR_MEDIA_VOLUME_LEVEL:
-                        state['value'] / 100,
+                        action_state['value'] / 100,
                 }, blocking=True, context=data.context)
 
 
@@ -1293,56 +1611,46 @@ class VolumeCapability(_RangeCapability):
 class ChannelCapability(_RangeCapability):
     """Set channel functionality."""
 
+    __slots__ = ()
+
     instance = 'channel'
     unit = None
 
-    script_channel_up = None
-    script_channel_down = None
-
-    def __init__(self, hass, state, config):
-        super().__init__(hass, state, config)
-        features = self.state.attributes.get(ATTR_SUPPORTED_FEATURES, 0)
-        self.retrievable = features & media_player.SUPPORT_PLAY_MEDIA != 0 and \
-            self.entity_config.get(CONF_CHANNEL_SET_VIA_MEDIA_CONTENT_ID)
-
-        channel_up = config.get(CONF_SCRIPT_CHANNEL_UP)
-        if channel_up:
-            self.script_channel_up = Script(hass, channel_up)
-
-        channel_down = config.get(CONF_SCRIPT_CHANNEL_DOWN)
-        if channel_down:
-            self.script_channel_down = Script(hass, channel_down)
+    def is_retrievable(self, state: State, entity_config: EntityConfig) -> bool:
+        features = state.attributes.get(ATTR_SUPPORTED_FEATURES, 0)
+        return bool(features & media_player.SUPPORT_PLAY_MEDIA != 0 and
+                    entity_config.channel_set_via_media_content_id)
 
     @classmethod
-    def supported(cls, domain: str, features: int, entity_config: Dict, attributes: Dict) -> bool:
+    def supported(cls, domain: str, features: int, entity_config: EntityConfig, attributes: Dict) -> bool:
         """Test if state is supported."""
         if domain == media_player.DOMAIN:
             return (features & media_player.SUPPORT_PLAY_MEDIA and
-                    entity_config.get(CONF_CHANNEL_SET_VIA_MEDIA_CONTENT_ID) and
+                    entity_config.channel_set_via_media_content_id and
                     (features & media_player.SUPPORT_PREVIOUS_TRACK or
-                     entity_config.get(CONF_SCRIPT_CHANNEL_DOWN)) and
+                     entity_config.script_channel_down) and
                     (features & media_player.SUPPORT_NEXT_TRACK) or
-                    entity_config.get(CONF_SCRIPT_CHANNEL_UP))
+                    entity_config.script_channel_up)
 
         return False
 
-    @property
-    def min_max_precision(self) -> Optional[Tuple[Union[int, float], Union[int, float], Union[int, float]]]:
-        return (0, 999, 1) if self.retrievable else None
+    def min_max_precision(self, state: State, entity_config: EntityConfig) \
+            -> Optional[Tuple[Union[int, float], Union[int, float], Union[int, float]]]:
+        return (0, 999, 1) if self.is_retrievable(state, entity_config) else None
 
-    @property
-    def random_access(self) -> bool:
-        return self.retrievable
+    def random_access(self, state: State, entity_config: EntityConfig) -> bool:
+        return self.is_retrievable(state, entity_config)
 
-    def get_value_default(self) -> Optional[Union[str, float, int]]:
+    def get_value_default(self, states: Mapping[str, State], state: State,
+                          entity_config: EntityConfig) -> Optional[Union[str, float, int]]:
         """Return the state value of this capability for this entity."""
-        if not self.retrievable or self.state.attributes.get(
+        if not self.is_retrievable(state, entity_config) or state.attributes.get(
                 media_player.ATTR_MEDIA_CONTENT_TYPE) \
                 != media_player.const.MEDIA_TYPE_CHANNEL:
             return 0
 
         try:
-            return int(self.state.attributes.get(
+            return int(state.attributes.get(
                 media_player.ATTR_MEDIA_CONTENT_ID))
 
         except ValueError:
@@ -1351,38 +1659,35 @@ class ChannelCapability(_RangeCapability):
         except TypeError:
             return 0
 
-    async def set_state_default(self, data: 'RequestData', state: Dict):
+    async def set_state_default(self, hass: HomeAssistantType, state: State, entity_config: EntityConfig,
+                                data: 'RequestData', action_state: Dict):
         """Set device state."""
-        if 'relative' in state and state['relative']:
-            if state['value'] > 0:
-                if self.script_channel_up:
-                    await self.script_channel_up.async_run({
-                        ATTR_ENTITY_ID: self.state.entity_id,
-                    }, context=data.context)
-                    return
-                else:
-                    service = media_player.SERVICE_MEDIA_NEXT_TRACK
+        if 'relative' in action_state and action_state['relative']:
+            if action_state['value'] > 0:
+                channel_script = entity_config.script_channel_up
+                service = media_player.SERVICE_MEDIA_NEXT_TRACK
             else:
-                if self.script_channel_down:
-                    await self.script_channel_down.async_run({
-                        ATTR_ENTITY_ID: self.state.entity_id,
-                    }, context=data.context)
-                    return
-                else:
-                    service = media_player.SERVICE_MEDIA_PREVIOUS_TRACK
-
-            await self.hass.services.async_call(
+                channel_script = entity_config.script_channel_down
+                service = media_player.SERVICE_MEDIA_PREVIOUS_TRACK
+
+            if channel_script:
+                await Script(hass, channel_script).async_run({
+                    ATTR_ENTITY_ID: state.entity_id,
+                }, context=data.context)
+                return
+
+            await hass.services.async_call(
                 media_player.DOMAIN,
                 service, {
-                    ATTR_ENTITY_ID: self.state.entity_id
+                    ATTR_ENTITY_ID: state.entity_id
                 }, blocking=True, context=data.context)
 
         else:
-            await self.hass.services.async_call(
+            await hass.services.async_call(
                 media_player.DOMAIN,
                 media_player.SERVICE_PLAY_MEDIA, {
-                    ATTR_ENTITY_ID: self.state.entity_id,
-                    media_player.const.ATTR_MEDIA_CONTENT_ID: state['value'],
+                    ATTR_ENTITY_ID: state.entity_id,
+                    media_player.const.ATTR_MEDIA_CONTENT_ID: action_state['value'],
                     media_player.const.ATTR_MEDIA_CONTENT_TYPE:
                         media_player.const.MEDIA_TYPE_CHANNEL,
                 }, blocking=True, context=data.context)
@@ -1390,65 +1695,95 @@ class ChannelCapability(_RangeCapability):
 
 @register_capability
 class OpenCapability(_RangeCapability):
+
+    __slots__ = ()
+
     instance = "open"
     unit = None
 
     @classmethod
-    def supported(cls, domain: str, features: int, entity_config: Dict, attributes: Dict) -> bool:
+    def supported(cls, domain: str, features: int, entity_config: EntityConfig, attributes: Dict) -> bool:
         if domain == cover.DOMAIN:
             return features & cover.SUPPORT_SET_POSITION
 
         return False
 
-    @property
-    def min_max_precision(self) -> Optional[Tuple[Union[int, float], Union[int, float], Union[int, float]]]:
+    def min_max_precision(self, state: State, entity_config: EntityConfig) \
+            -> Optional[Tuple[Union[int, float], Union[int, float], Union[int, float]]]:
         return 0, 100, 1
 
-    @property
-    def random_access(self) -> bool:
+    def random_access(self, state: State, entity_config: EntityConfig) -> bool:
         return True
 
-    def get_value_default(self) -> Optional[Union[str, float, int]]:
-        return self.state.attributes.get(cover.ATTR_CURRENT_POSITION)
+    def get_value_default(self, states: Mapping[str, State], state: State,
+                          entity_config: EntityConfig) -> Optional[Union[str, float, int]]:
+        return state.attributes.get(cover.ATTR_CURRENT_POSITION)
 
-    async def set_state_default(self, data: 'RequestData', state: Dict):
-        await self.hass.services.async_call(
+    async def set_state_default(self, hass: HomeAssistantType, state: State, entity_config: EntityConfig,
+                                data: 'RequestData', action_state: Dict):
+        await hass.services.async_call(
             cover.DOMAIN,
             cover.SERVICE_SET_COVER_POSITION, {
-                ATTR_ENTITY_ID: self.state.entity_id,
-                cover.ATTR_POSITION: state['value']
+                ATTR_ENTITY_ID: state.entity_id,
+                cover.ATTR_POSITION: action_state['value']
             }, blocking=True, context=data.context)
 
 
+# Color conversions are shared by all color capabilities. Most installations
+# have only a handful of distinct values (light models, presets), so results
+# are memoized.
+COLOR_CONVERSIONS_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=COLOR_CONVERSIONS_CACHE_SIZE)
+def mired_to_kelvin(mireds: float) -> int:
+    """Convert color temperature in mireds into kelvin."""
+    return color_util.color_temperature_mired_to_kelvin(mireds)
+
+
+@lru_cache(maxsize=COLOR_CONVERSIONS_CACHE_SIZE)
+def pack_rgb(color: Tuple[int, int, int]) -> int:
+    """Pack RGB color tuple into integer (0xRRGGBB)."""
+    return (color[0] << 16) + (color[1] << 8) + color[2]
+
+
+@lru_cache(maxsize=COLOR_CONVERSIONS_CACHE_SIZE)
+def unpack_rgb(value: int) -> Tuple[int, int, int]:
+    """Unpack integer (0xRRGGBB) into RGB color tuple."""
+    return (value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF
+
+
 class _ColorSettingCapability(_Capability):
     """Base color setting functionality.
 
     https://yandex.ru/dev/dialogs/alice/doc/smart-home/concepts/color_setting-docpage/
     """
 
+    __slots__ = ()
+
     type = CAPABILITIES_COLOR_SETTING
 
-    def parameters_default(self):
+    def parameters_default(self, states: Mapping[str, State], state: State, entity_config: EntityConfig):
         """Return parameters for a devices request."""
         result = {}
 
-        features = self.state.attributes.get(ATTR_SUPPORTED_FEATURES, 0)
+        features = state.attributes.get(ATTR_SUPPORTED_FEATURES, 0)
 
         if features & light.SUPPORT_COLOR:
             result['color_model'] = 'rgb'
 
         if features & light.SUPPORT_COLOR_TEMP:
-            max_temp = self.state.attributes[light.ATTR_MIN_MIREDS]
-            min_temp = self.state.attributes[light.ATTR_MAX_MIREDS]
+            max_temp = state.attributes[light.ATTR_MIN_MIREDS]
+            min_temp = state.attributes[light.ATTR_MAX_MIREDS]
             result['temperature_k'] = {
-                'min': color_util.color_temperature_mired_to_kelvin(min_temp),
-                'max': color_util.color_temperature_mired_to_kelvin(max_temp)
+                'min': mired_to_kelvin(min_temp),
+                'max': mired_to_kelvin(max_temp)
             }
 
         return result
 
     @classmethod
-    def has_override(cls, domain: str, entity_config: Dict, attributes: Dict) -> bool:
+    def has_override(cls, domain: str, entity_config: EntityConfig, attributes: Dict) -> bool:
         return False
 
 
@@ -1456,63 +1791,65 @@ class _ColorSettingCapability(_Capability):
 class RgbCapability(_ColorSettingCapability):
     """RGB color functionality."""
 
+    __slots__ = ()
+
     instance = 'rgb'
 
     @classmethod
-    def supported(cls, domain: str, features: int, entity_config: Dict, attributes: Dict) -> bool:
+    def supported(cls, domain: str, features: int, entity_config: EntityConfig, attributes: Dict) -> bool:
         """Test if state is supported."""
         return domain == light.DOMAIN and features & light.SUPPORT_COLOR
 
-    def get_value_default(self) -> Optional[Union[str, float, int]]:
+    def get_value_default(self, states: Mapping[str, State], state: State,
+                          entity_config: EntityConfig) -> Optional[Union[str, float, int]]:
         """Return the state value of this capability for this entity."""
-        color = self.state.attributes.get(light.ATTR_RGB_COLOR)
+        color = state.attributes.get(light.ATTR_RGB_COLOR)
         if color is None:
             return 0
 
-        rgb = color[0]
-        rgb = (rgb << 8) + color[1]
-        rgb = (rgb << 8) + color[2]
+        return pack_rgb(tuple(color))
 
-        return rgb
+    def get_service_call(self, state: State, entity_config: EntityConfig, action_state: Dict) -> Optional[ServiceCall]:
+        return ServiceCall(light.DOMAIN, light.SERVICE_TURN_ON, {
+            light.ATTR_RGB_COLOR: unpack_rgb(action_state['value'])
+        }, exclusive=(self.type,))
 
-    async def set_state_default(self, data: 'RequestData', state: Dict) -> None:
+    async def set_state_default(self, hass: HomeAssistantType, state: State, entity_config: EntityConfig,
+                                data: 'RequestData', action_state: Dict) -> None:
         """Set device state."""
-        red = (state['value'] >> 16) & 0xFF
-        green = (state['value'] >> 8) & 0xFF
-        blue = state['value'] & 0xFF
-
-        await self.hass.services.async_call(
-            light.DOMAIN,
-            light.SERVICE_TURN_ON, {
-                ATTR_ENTITY_ID: self.state.entity_id,
-                light.ATTR_RGB_COLOR: (red, green, blue)
-            }, blocking=True, context=data.context)
+        await self.get_service_call(state, entity_config, action_state).async_call(
+            hass, state.entity_id, data.context)
 
 
 @register_capability
 class TemperatureKCapability(_ColorSettingCapability):
     """Color temperature functionality."""
 
+    __slots__ = ()
+
     instance = 'temperature_k'
 
     @classmethod
-    def supported(cls, domain: str, features: int, entity_config: Dict, attributes: Dict) -> bool:
+    def supported(cls, domain: str, features: int, entity_config: EntityConfig, attributes: Dict) -> bool:
         """Test if state is supported."""
         return domain == light.DOMAIN and features & light.SUPPORT_COLOR_TEMP
 
-    def get_value_default(self) -> Optional[Union[str, float, int]]:
+    def get_value_default(self, states: Mapping[str, State], state: State,
+                          entity_config: EntityConfig) -> Optional[Union[str, float, int]]:
         """Return the state value of this capability for this entity."""
-        kelvin = self.state.attributes.get(light.ATTR_COLOR_TEMP)
-        if kelvin is None:
+        mireds = state.attributes.get(light.ATTR_COLOR_TEMP)
+        if mireds is None:
             return 0
 
-        return color_util.color_temperature_mired_to_kelvin(kelvin)
+        return mired_to_kelvin(mireds)
 
-    async def set_state_default(self, data: 'RequestData', state: Dict) -> None:
+    def get_service_call(self, state: State, entity_config: EntityConfig, action_state: Dict) -> Optional[ServiceCall]:
+        return ServiceCall(light.DOMAIN, light.SERVICE_TURN_ON, {
+            light.ATTR_KELVIN: action_state['value']
+        }, exclusive=(self.type,))
+
+    async def set_state_default(self, hass: HomeAssistantType, state: State, entity_config: EntityConfig,
+                                data: 'RequestData', action_state: Dict) -> None:
         """Set device state."""
-        await self.hass.services.async_call(
-            light.DOMAIN,
-            light.SERVICE_TURN_ON, {
-                ATTR_ENTITY_ID: self.state.entity_id,
-                light.ATTR_KELVIN: state['value']
-            }, blocking=True, context=data.context)
+        await self.get_service_call(state, entity_config, action_state).async_call(
+            hass, state.entity_id, data.context)
@@ -1,8 +1,8 @@
 """Implement the Yandex Smart Home properties."""
 import logging
-from typing import Dict, Any, List, Type
+from typing import Dict, Any, List, Type, Mapping, Optional, Union
 
-from homeassistant.components import (
+from ..core.components import (
     climate,
     sensor,
     air_quality,
@@ -14,12 +14,12 @@ from homeassistant.const import (
     DEVICE_CLASS_TEMPERATURE,
     STATE_UNAVAILABLE,
     STATE_UNKNOWN,
-    POWER_WATT, DEVICE_CLASS_BATTERY, UNIT_PERCENTAGE, CONF_ENTITY_ID,
+    POWER_WATT, DEVICE_CLASS_BATTERY, UNIT_PERCENTAGE,
 )
 
+from homeassistant.core import State
+
 from ..const import (
-    CONF_ENTITY_PROPERTIES,
-    CONF_ATTRIBUTE,
     ATTR_CURRENT_POWER_W,
     ATTR_WATER_LEVEL,
     UNIT_VOLT,
@@ -28,45 +28,56 @@ from ..const import (
     UNIT_MILLIVOLT,
     UNIT_AMPERE,
 )
+from ..core.entity_config import EntityConfig
 
 _LOGGER = logging.getLogger(__name__)
 
 PREFIX_PROPERTIES = 'devices.properties.'
 PROPERTY_FLOAT = PREFIX_PROPERTIES + 'float'
 
-PROPERTIES: List[Type['_Property']] = []
+PROPERTIES: List['_Property'] = []
 
 
-def register_property(prop):
-    """Decorate a function to register a property."""
-    PROPERTIES.append(prop)
+def register_property(prop: Type['_Property']):
+    """Decorate a class to register its (only) property instance."""
+    PROPERTIES.append(prop())
     return prop
 
 
 class _Property:
-    """Represents a Property."""
+    """Represents a Property.
+
+    A single registered instance serves every entity, therefore properties
+    must not store entity-related data.
+    """
+
+    __slots__ = ()
+
     unit = ''
     type = ''
     instance = ''
-    supported_sensor_units = []
     default_value = None
 
-    def __init__(self, hass, state, entity_config):
-        """Initialize a trait for a state."""
-        self.hass = hass
-        self.state = state
-        self.entity_config = entity_config
-
     @classmethod
-    def supported(cls, domain: str, features: int, entity_config: Dict, attributes: Dict) -> bool:
+    def supported(cls, domain: str, features: int, entity_config: EntityConfig, attributes: Dict) -> bool:
         return False
 
     @classmethod
-    def has_override(cls, _: str, entity_config: Dict, __: Dict) -> bool:
-        entity_properties = entity_config.get(CONF_ENTITY_PROPERTIES)
-        return bool(entity_properties) and bool(entity_properties.get(cls.instance))
+    def has_override(cls, _: str, entity_config: EntityConfig, __: Dict) -> bool:
+        return cls.instance in entity_config.properties
+
+    def bind(self, entity_config: EntityConfig) -> Union['_Property', 'PropertyOverride']:
+        """Return property accessor for given entity config.
+
+        Overridden properties are bound to their source once, so that reads
+        do not have to parse entity config again.
+        """
+        property_config = entity_config.properties.get(self.instance)
+        if property_config is not None:
+            return PropertyOverride(self, property_config.entity_id, property_config.attribute)
+        return self
 
-    def description(self):
+    def description(self, states: Mapping[str, State], state: State, entity_config: EntityConfig):
         """Return description for a devices request."""
         response = {
             'type': self.type,
@@ -78,13 +89,13 @@ class _Property:
 
         return response
 
-    def get_state(self):
-        """Return the state of this property for this entity."""
+    def get_state(self, states: Mapping[str, State], state: State, entity_config: EntityConfig):
+        """Return the state of this property for given entity."""
         return {
             'type': self.type,
             'state': {
                 'instance': self.instance,
-                'value': self.get_value()
+                'value': self.get_value(states, state, entity_config)
             }
         }
 
@@ -94,57 +105,102 @@ class _Property:
             'unit': self.unit
         }
 
-    def get_value(self):
-        """Return the state value of this capability for this entity."""
-        state = self.state
-        if self.has_override(state.domain, self.entity_config, state.attributes):
-            return self.get_value_override()
+    def get_value(self, states: Mapping[str, State], state: State, entity_config: EntityConfig):
+        """Return the state value of this property for given entity (overrides are served by `bind`)."""
         if state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN) and self.default_value is not None:
             return self.default_value
-        return self.get_value_default()
+        return self.get_value_default(state)
     
-    def get_value_default(self) -> Any:
+    def get_value_default(self, state: State) -> Any:
         raise NotImplementedError("Properties must implement this!")
 
-    def get_value_override(self) -> Any:
-        raise NotImplementedError("Properties must implement this!")
 
+class PropertyOverride:
+    """Property bound to an override source from entity config."""
 
-class _FloatProperty(_Property):
-    """Represents base class for float properties."""
-    type = PROPERTY_FLOAT
-    default_value = 0.0
+    __slots__ = ('property', 'type', 'instance', 'entity_id', 'attribute')
+
+    def __init__(self, prop: _Property, entity_id: Optional[str], attribute: Optional[str]):
+        """
+        Initialize override accessor.
+        :param prop: Overridden property
+        :param entity_id: Source entity ID (entity itself if None)
+        :param attribute: Source attribute (state value if None)
+        """
+        self.property = prop
+        self.type = prop.type
+        self.instance = prop.instance
+        self.entity_id = entity_id
+        self.attribute = attribute
 
-    def get_value_default(self) -> float:
-        return float(self.state.state)
+    def description(self, states: Mapping[str, State], state: State, entity_config: EntityConfig):
+        """Return description for a devices request."""
+        return self.property.description(states, state, entity_config)
 
-    def get_value_override(self) -> float:
-        property_config = self.entity_config[CONF_ENTITY_PROPERTIES][self.instance]
+    def get_state(self, states: Mapping[str, State], state: State, entity_config: EntityConfig):
+        """Return the state of overridden property for given entity."""
+        return {
+            'type': self.type,
+            'state': {
+                'instance': self.instance,
+                'value': self.get_value(states, state, entity_config)
+            }
+        }
 
-        if CONF_ENTITY_ID in property_config:
-            property_entity_id = property_config.get(CONF_ENTITY_ID)
-            state = self.hass.states.get(property_entity_id)
-        else:
-            state = self.state
+    def get_value(self, states: Mapping[str, State], state: State, entity_config: EntityConfig) -> float:
+        """Return the state value of overridden property from its source."""
+        if self.entity_id is not None:
+            state = states.get(self.entity_id)
 
         if not state or state.state in (STATE_UNKNOWN, STATE_UNAVAILABLE):
             return 0.0
 
-        if CONF_ATTRIBUTE in property_config:
-            attribute = property_config.get(CONF_ATTRIBUTE)
-            return float(state.get(attribute, 0.0))
+        if self.attribute is not None:
+            return float(state.attributes.get(self.attribute, 0.0))
 
         return float(state.state)
 
 
+class _FloatProperty(_Property):
+    """Represents base class for float properties.
+
+    Default getter returns raw value. Sensor states are in entity's unit of
+    measurement and are converted to property unit using `unit_scales`;
+    attribute values (e.g. `current_power_w`) carry units of their own.
+    """
+
+    __slots__ = ()
+
+    type = PROPERTY_FLOAT
+    default_value = 0.0
+
+    # Unit of measurement -> multiplier to convert values into property unit
+    unit_scales: Mapping[Optional[str], float] = {}
+
+    def get_value(self, states: Mapping[str, State], state: State, entity_config: EntityConfig) -> float:
+        """Return the state value of this property for given entity."""
+        if state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+            return self.default_value
+        value = float(self.get_value_default(state))
+        if state.domain == sensor.DOMAIN:
+            value *= self.unit_scales.get(state.attributes.get(ATTR_UNIT_OF_MEASUREMENT), 1.0)
+        return value
+
+    def get_value_default(self, state: State) -> Any:
+        return state.state
+
+
 @register_property
 class TemperatureProperty(_FloatProperty):
     """Temperature property"""
+
+    __slots__ = ()
+
     instance = 'temperature'
     unit = 'unit.temperature.celsius'
 
     @classmethod
-    def supported(cls, domain: str, features: int, entity_config: Dict, attributes: Dict) -> bool:
+    def supported(cls, domain: str, features: int, entity_config: EntityConfig, attributes: Dict) -> bool:
         if domain == sensor.DOMAIN:
             return attributes.get(ATTR_DEVICE_CLASS) == DEVICE_CLASS_TEMPERATURE
         elif domain == climate.DOMAIN:
@@ -152,23 +208,23 @@ class TemperatureProperty(_FloatProperty):
 
         return False
 
-    def get_value_default(self) -> float:
-        value = 0.0
-        if self.state.domain == sensor.DOMAIN:
-            value = self.state.state
-        elif self.state.domain == climate.DOMAIN:
-            value = self.state.attributes.get(climate.ATTR_CURRENT_TEMPERATURE)
-        return float(value)
+    def get_value_default(self, state: State) -> Any:
+        if state.domain == climate.DOMAIN:
+            return state.attributes.get(climate.ATTR_CURRENT_TEMPERATURE)
+        return state.state
 
 
 @register_property
 class HumidityProperty(_FloatProperty):
     """Humidity property."""
+
+    __slots__ = ()
+
     instance = "humidity"
     unit = "unit.percent"
 
     @classmethod
-    def supported(cls, domain: str, features: int, entity_config: Dict, attributes: Dict) -> bool:
+    def supported(cls, domain: str, features: int, entity_config: EntityConfig, attributes: Dict) -> bool:
         if domain == sensor.DOMAIN:
             return attributes.get(ATTR_DEVICE_CLASS) == DEVICE_CLASS_HUMIDITY
         elif domain == climate.DOMAIN:
@@ -176,123 +232,126 @@ class HumidityProperty(_FloatProperty):
 
         return False
 
-    def get_value_default(self):
-        value = 0
-        if self.state.domain == sensor.DOMAIN:
-            value = self.state.state
-        elif self.state.domain == climate.DOMAIN:
-            value = self.state.attributes.get(climate.ATTR_CURRENT_HUMIDITY)
-        return float(value)
+    def get_value_default(self, state: State) -> Any:
+        if state.domain == climate.DOMAIN:
+            return state.attributes.get(climate.ATTR_CURRENT_HUMIDITY)
+        return state.state
 
 
 @register_property
 class WaterLevelProperty(_FloatProperty):
     """Water level property."""
+
+    __slots__ = ()
+
     instance = "water_level"
     unit = "unit.percent"
 
     @classmethod
-    def supported(cls, domain: str, features: int, entity_config: Dict, attributes: Dict) -> bool:
+    def supported(cls, domain: str, features: int, entity_config: EntityConfig, attributes: Dict) -> bool:
         return attributes.get(ATTR_WATER_LEVEL) is not None
     
-    def get_value_default(self):
-        return float(self.state.attributes.get(ATTR_WATER_LEVEL, 0.0))
+    def get_value_default(self, state: State) -> Any:
+        return state.attributes.get(ATTR_WATER_LEVEL, 0.0)
 
 
 @register_property
 class CO2LevelProperty(_FloatProperty):
     """Water level property."""
+
+    __slots__ = ()
+
     instance = "co2_level"
     unit = "unit.ppm"
 
     @classmethod
-    def supported(cls, domain: str, features: int, entity_config: Dict, attributes: Dict) -> bool:
+    def supported(cls, domain: str, features: int, entity_config: EntityConfig, attributes: Dict) -> bool:
         return domain == air_quality.DOMAIN and \
             attributes.get(air_quality.ATTR_CO2) is not None
     
-    def get_value_default(self):
-        return float(self.state.attributes.get(air_quality.ATTR_CO2, 0.0))
+    def get_value_default(self, state: State) -> Any:
+        return state.attributes.get(air_quality.ATTR_CO2, 0.0)
 
 
 @register_property
 class PowerProperty(_FloatProperty):
     """Current power property."""
+
+    __slots__ = ()
+
     instance = "power"
     unit = "unit.watt"
 
-    supported_sensor_units = [
-        POWER_WATT,
-        f'k{POWER_WATT}',
-    ]
+    unit_scales = {
+        POWER_WATT: 1.0,
+        f'k{POWER_WATT}': 1000.0,
+    }
 
     @classmethod
-    def supported(cls, domain: str, features: int, entity_config: Dict, attributes: Dict) -> bool:
+    def supported(cls, domain: str, features: int, entity_config: EntityConfig, attributes: Dict) -> bool:
         if domain == sensor.DOMAIN:
-            return attributes.get(ATTR_UNIT_OF_MEASUREMENT) in cls.supported_sensor_units
+            return attributes.get(ATTR_UNIT_OF_MEASUREMENT) in cls.unit_scales
 
         return attributes.get(ATTR_CURRENT_POWER_W) is not None
 
-    def get_value_default(self):
-        if self.state.domain == sensor.DOMAIN:
-            unit_of_measurement = self.state.attributes.get(ATTR_UNIT_OF_MEASUREMENT)
-
-            if unit_of_measurement is None or unit_of_measurement == POWER_WATT:
-                return float(self.state.state)
-            elif unit_of_measurement == 'k' + POWER_WATT:
-                return float(self.state.state) / 1000.0
-
-        return float(self.state.attributes(ATTR_CURRENT_POWER_W, 0.0))
+    def get_value_default(self, state: State) -> Any:
+        if state.domain == sensor.DOMAIN:
+            return state.state
+        return state.attributes.get(ATTR_CURRENT_POWER_W, 0.0)
 
 
 @register_property
 class VoltageProperty(_FloatProperty):
     """Voltage property."""
+
+    __slots__ = ()
+
     instance = "voltage"
     unit = "unit.volt"
 
-    supported_sensor_units = [UNIT_VOLT, UNIT_KILOVOLT, UNIT_MEGAVOLT, UNIT_MILLIVOLT]
+    unit_scales = {
+        UNIT_VOLT: 1.0,
+        UNIT_KILOVOLT: 1000.0,
+        UNIT_MEGAVOLT: 1000000.0,
+        UNIT_MILLIVOLT: 0.001,
+    }
 
     @classmethod
-    def supported(cls, domain: str, features: int, entity_config: Dict, attributes: Dict) -> bool:
+    def supported(cls, domain: str, features: int, entity_config: EntityConfig, attributes: Dict) -> bool:
         return domain == sensor.DOMAIN and \
-            attributes.get(ATTR_UNIT_OF_MEASUREMENT) in cls.supported_sensor_units
-
-    def get_value_default(self) -> float:
-        unit_of_measurement = self.state.attributes.get(ATTR_UNIT_OF_MEASUREMENT)
-        if unit_of_measurement == UNIT_MEGAVOLT:
-            return float(self.state.state) / 1000000.0
-        elif unit_of_measurement == UNIT_KILOVOLT:
-            return float(self.state.state) / 1000.0
-        elif unit_of_measurement == UNIT_MILLIVOLT:
-            return float(self.state.state) * 1000.0
-        return float(self.state.state)
+            attributes.get(ATTR_UNIT_OF_MEASUREMENT) in cls.unit_scales
 
 
 @register_property
 class AmperageProperty(_FloatProperty):
     """Voltage property."""
+
+    __slots__ = ()
+
     instance = "amperage"
     unit = "unit.ampere"
 
+    unit_scales = {
+        UNIT_AMPERE: 1.0,
+    }
+
     @classmethod
-    def supported(cls, domain: str, features: int, entity_config: Dict, attributes: Dict) -> bool:
+    def supported(cls, domain: str, features: int, entity_config: EntityConfig, attributes: Dict) -> bool:
         return domain == sensor.DOMAIN and \
-               attributes.get(ATTR_UNIT_OF_MEASUREMENT) == UNIT_AMPERE
-
-    def get_value_default(self) -> float:
-        return float(self.state.state)
+               attributes.get(ATTR_UNIT_OF_MEASUREMENT) in cls.unit_scales
 
 
 @register_property
 class BatteryLevelProperty(_FloatProperty):
     """Battery level property."""
+
+    __slots__ = ()
+
     instance = "battery_level"
     unit = "unit.percent"
 
     @classmethod
-    def supported(cls, domain: str, features: int, entity_config: Dict, attributes: Dict) -> bool:
+    def supported(cls, domain: str, features: int, entity_config: EntityConfig, attributes: Dict) -> bool:
         return attributes.get(ATTR_DEVICE_CLASS) == DEVICE_CLASS_BATTERY and \
                attributes.get(ATTR_UNIT_OF_MEASUREMENT) == UNIT_PERCENTAGE
 
-    def get_value_default(self) -> float:
-        return float(self.state.state)
@@ -1,8 +1,11 @@
-from typing import Optional, Dict, Any, Union, TYPE_CHECKING
+from time import monotonic
+from typing import Optional, Dict, Any, Union, Callable, TYPE_CHECKING
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import STATE_OK
+from homeassistant.core import callback
 from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.typing import HomeAssistantType
 
 from .const import (
@@ -10,12 +13,18 @@ from .const import (
     ATTR_LAST_SYNC_TIME,
     ATTR_LAST_ACTION_TIME,
     ATTR_LAST_ACTION_TARGETS,
-    ATTR_SYNCED_DEVICES_COUNT, ATTR_YANDEX_TYPE
+    ATTR_SYNCED_DEVICES_COUNT, ATTR_YANDEX_TYPE,
+    ATTR_RATE_LIMITED_COUNT, ATTR_QUERY_CACHE_HITS, ATTR_QUERY_CACHE_MISSES,
+    ATTR_SYNC_TRUNCATED_COUNT, ATTR_REQUESTS_COUNT, ATTR_ERRORS_COUNT, ATTR_DEVICES_COUNT,
+    RATE_LIMIT_ENDPOINTS
 )
 
 if TYPE_CHECKING:
     from datetime import datetime
 
+# Request path -> endpoint key used in statistics attributes
+_ENDPOINT_KEYS = {path: key for key, path in RATE_LIMIT_ENDPOINTS.items()}
+
 
 # noinspection PyUnusedLocal
 async def async_setup_entry(hass: HomeAssistantType, entry: ConfigEntry, async_add_entities):
@@ -35,6 +44,17 @@ class YandexStatisticsSensor(Entity):
         self._last_action_time = None
         self._last_sync_time = None
         self._synced_devices_count = None
+        self._rate_limited_count = 0
+        self._sync_truncated_count = None
+
+        # Endpoint key -> counter
+        self._requests_count = dict.fromkeys(RATE_LIMIT_ENDPOINTS, 0)
+        self._errors_count = dict.fromkeys(RATE_LIMIT_ENDPOINTS, 0)
+        self._devices_count = dict.fromkeys(RATE_LIMIT_ENDPOINTS, 0)
+
+        self._update_interval = 0
+        self._last_update_time = None
+        self._cancel_update: Optional[Callable[[], None]] = None
 
         self._identifier = (DOMAIN, "status")
 
@@ -42,22 +62,76 @@ class YandexStatisticsSensor(Entity):
         """Run when entity about to be added to hass."""
         if self.hass.data.get(DOMAIN):
             self.hass.data[DOMAIN].sensor_status = self
+            self._update_interval = self.hass.data[DOMAIN].stats_update_interval
 
     async def async_will_remove_from_hass(self) -> None:
         """Run when entity will be removed from hass."""
+        if self._cancel_update:
+            self._cancel_update()
+            self._cancel_update = None
+
         if self.hass.data.get(DOMAIN):
             self.hass.data[DOMAIN].sensor_status = None
 
+    def _schedule_update(self) -> None:
+        """
+        Schedule state update, coalescing updates to at most one per update interval.
+
+        Recorded values accumulate in memory; when an update is already
+        scheduled, it reports them as well.
+        """
+        if self._cancel_update is not None or self.hass is None:
+            return
+
+        delay = 0
+        if self._last_update_time is not None:
+            delay = self._last_update_time + self._update_interval - monotonic()
+
+        if delay > 0:
+            self._cancel_update = async_call_later(self.hass, delay, self._async_scheduled_update)
+        else:
+            # values recorded within the same loop iteration are reported with a single update
+            self._cancel_update = self.hass.loop.call_soon(self._async_scheduled_update, None).cancel
+
+    @callback
+    def _async_scheduled_update(self, _) -> None:
+        """Update state with values recorded since the last update."""
+        self._cancel_update = None
+        self._last_update_time = monotonic()
+        self.async_schedule_update_ha_state()
+
+    def record_request(self, action: str, devices_count: int, is_error: bool) -> None:
+        """Count handled request along with devices it concerned."""
+        endpoint = _ENDPOINT_KEYS.get(action)
+        if endpoint is None:
+            return
+
+        self._requests_count[endpoint] += 1
+        self._devices_count[endpoint] += devices_count
+        if is_error:
+            self._errors_count[endpoint] += 1
+        self._schedule_update()
+
     def record_action(self, datetime_at: 'datetime', targets) -> None:
         """Shorthand method for action recording."""
         self._last_action_time = str(datetime_at)
         self._last_action_targets = list(targets.keys())
-        self.schedule_update_ha_state()
+        self._schedule_update()
+
+    def record_rate_limited(self) -> None:
+        """Count rejected request."""
+        self._rate_limited_count += 1
+        self._schedule_update()
 
     def record_sync(self, datetime_at: 'datetime', devices) -> None:
         self._last_sync_time = str(datetime_at)
         self._synced_devices_count = len(devices)
-        self.schedule_update_ha_state()
+        self._schedule_update()
+
+    def record_sync_truncation(self, truncated_count: int) -> None:
+        """Record count of devices left out of the last devices response."""
+        self._sync_truncated_count = truncated_count
+        self._schedule_update()
 
     @property
     def name(self) -> Optional[str]:
@@ -73,14 +147,29 @@ class YandexStatisticsSensor(Entity):
 
     @property
     def device_state_attributes(self) -> Optional[Dict[str, Any]]:
-        return {
+        attributes = {
             ATTR_LAST_SYNC_TIME: self._last_sync_time,
             ATTR_LAST_ACTION_TIME: self._last_action_time,
             ATTR_LAST_ACTION_TARGETS: self._last_action_targets,
             ATTR_SYNCED_DEVICES_COUNT: self._synced_devices_count,
+            ATTR_RATE_LIMITED_COUNT: self._rate_limited_count,
+            # Counters are copied, so that previous states do not change along
+            ATTR_REQUESTS_COUNT: dict(self._requests_count),
+            ATTR_ERRORS_COUNT: dict(self._errors_count),
+            ATTR_DEVICES_COUNT: dict(self._devices_count),
             ATTR_YANDEX_TYPE: False,
         }
 
+        config = self.hass.data.get(DOMAIN) if self.hass else None
+        if config and config.query_cache:
+            attributes[ATTR_QUERY_CACHE_HITS] = config.query_cache.hits
+            attributes[ATTR_QUERY_CACHE_MISSES] = config.query_cache.misses
+
+        if config and config.sync_limit:
+            attributes[ATTR_SYNC_TRUNCATED_COUNT] = self._sync_truncated_count
+
+        return attributes
+
     @property
     def should_poll(self) -> bool:
         return False
@@ -0,0 +1,123 @@
+"""Tests for execution of device actions."""
+import asyncio
+import tempfile
+
+from homeassistant.components import light
+from homeassistant.const import ATTR_ENTITY_ID, ATTR_SUPPORTED_FEATURES
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entityfilter
+
+from custom_components.yandex_smart_home.const import ERR_INTERNAL_ERROR
+from custom_components.yandex_smart_home.core.helpers import Config
+from custom_components.yandex_smart_home.core.smart_home import async_handle_message
+
+LIGHT_FEATURES = light.SUPPORT_BRIGHTNESS | light.SUPPORT_COLOR | light.SUPPORT_COLOR_TEMP
+
+ON_OFF = 'devices.capabilities.on_off'
+RANGE = 'devices.capabilities.range'
+COLOR_SETTING = 'devices.capabilities.color_setting'
+
+
+def _run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+async def _async_execute(setup, devices):
+    """Set up hass with recorded services and handle an action request for given devices."""
+    hass = HomeAssistant()
+    hass.config.config_dir = tempfile.mkdtemp()
+    calls = []
+
+    async def handler(call):
+        calls.append((call.domain, call.service, dict(call.data)))
+        if call.data[ATTR_ENTITY_ID] == 'switch.bad':
+            raise RuntimeError('boom')
+
+    for domain in ('light', 'switch', 'homeassistant'):
+        for service in ('turn_on', 'turn_off'):
+            hass.services.async_register(domain, service, handler)
+
+    setup(hass)
+    config = Config(should_expose=entityfilter.generate_filter([], [], [], []))
+
+    try:
+        response = await async_handle_message(hass, config, 'user', 'request', '/user/devices/action', {
+            'payload': {'devices': devices}
+        })
+    finally:
+        await hass.async_stop(force=True)
+
+    return response, calls
+
+
+def _setup_light(hass):
+    hass.states.async_set('light.test', 'off', {ATTR_SUPPORTED_FEATURES: LIGHT_FEATURES})
+
+
+def _results(response):
+    return {
+        device['id']: {
+            (capability['type'], capability['state']['instance']): capability['state']['action_result']
+            for capability in device['capabilities']
+        }
+        for device in response['payload']['devices']
+    }
+
+
+def test_compatible_calls_are_merged():
+    response, calls = _run(_async_execute(_setup_light, [{
+        'id': 'light.test',
+        'capabilities': [
+            {'type': ON_OFF, 'state': {'instance': 'on', 'value': True}},
+            {'type': RANGE, 'state': {'instance': 'brightness', 'value': 50}},
+            {'type': COLOR_SETTING, 'state': {'instance': 'rgb', 'value': 0xFF0000}},
+        ]
+    }]))
+
+    assert calls == [('light', 'turn_on', {
+        ATTR_ENTITY_ID: 'light.test',
+        light.ATTR_BRIGHTNESS_PCT: 50,
+        light.ATTR_RGB_COLOR: (255, 0, 0),
+    })]
+    assert _results(response) == {'light.test': {
+        (ON_OFF, 'on'): {'status': 'DONE'},
+        (RANGE, 'brightness'): {'status': 'DONE'},
+        (COLOR_SETTING, 'rgb'): {'status': 'DONE'},
+    }}
+
+
+def test_exclusive_calls_are_split():
+    _, calls = _run(_async_execute(_setup_light, [{
+        'id': 'light.test',
+        'capabilities': [
+            {'type': COLOR_SETTING, 'state': {'instance': 'rgb', 'value': 0xFF0000}},
+            {'type': COLOR_SETTING, 'state': {'instance': 'temperature_k', 'value': 4000}},
+        ]
+    }]))
+
+    assert calls == [
+        ('light', 'turn_on', {ATTR_ENTITY_ID: 'light.test', light.ATTR_RGB_COLOR: (255, 0, 0)}),
+        ('light', 'turn_on', {ATTR_ENTITY_ID: 'light.test', light.ATTR_KELVIN: 4000}),
+    ]
+
+
+def test_device_error_does_not_fail_other_devices():
+    def setup(hass):
+        hass.states.async_set('switch.bad', 'off')
+        hass.states.async_set('switch.good', 'off')
+
+    capabilities = [{'type': ON_OFF, 'state': {'instance': 'on', 'value': True}}]
+    response, calls = _run(_async_execute(setup, [
+        {'id': 'switch.bad', 'capabilities': capabilities},
+        {'id': 'switch.good', 'capabilities': capabilities},
+    ]))
+
+    assert ('switch', 'turn_on', {ATTR_ENTITY_ID: 'switch.good'}) in calls
+    assert _results(response) == {
+        'switch.bad': {(ON_OFF, 'on'): {'status': 'ERROR', 'error_code': ERR_INTERNAL_ERROR}},
+        'switch.good': {(ON_OFF, 'on'): {'status': 'DONE'}},
+    }
@@ -0,0 +1,73 @@
+"""Tests for matching of remote addresses against networks."""
+import ipaddress
+
+from custom_components.yandex_smart_home.core.helpers import NetworkMatcher
+
+
+def _matcher(*networks, **kwargs):
+    return NetworkMatcher([ipaddress.ip_network(network) for network in networks], **kwargs)
+
+
+def test_ipv4_prefixes():
+    matcher = _matcher('5.45.192.0/18', '77.88.0.0/18', '10.0.0.1/32')
+
+    assert matcher.match('5.45.192.1')
+    assert matcher.match('5.45.255.255')
+    assert matcher.match('77.88.63.255')
+    assert matcher.match('10.0.0.1')
+    assert not matcher.match('5.45.191.255')
+    assert not matcher.match('77.88.64.0')
+    assert not matcher.match('10.0.0.2')
+
+
+def test_ipv6_prefixes():
+    matcher = _matcher('2a02:6b8::/29', '::1/128', '10.0.0.0/8')
+
+    assert matcher.match('2a02:6b8:c00::1')
+    assert matcher.match('2a02:6bf:ffff::1')
+    assert matcher.match('::1')
+    assert not matcher.match('2a02:6c0::1')
+    assert not matcher.match('::2')
+    # IPv4 networks do not match IPv4-mapped IPv6 addresses
+    assert not matcher.match('::ffff:10.0.0.1')
+
+
+def test_nested_networks():
+    matcher = _matcher('192.168.1.0/24', '192.168.0.0/16')
+
+    assert matcher.match('192.168.1.1')
+    assert matcher.match('192.168.200.1')
+    assert not matcher.match('192.169.0.1')
+
+
+def test_invalid_and_empty_addresses():
+    matcher = _matcher('0.0.0.0/0')
+
+    assert matcher.match('8.8.8.8')
+    assert not matcher.match('not-an-address')
+    assert not matcher.match('')
+    assert not matcher.match(None)
+
+
+def test_cached_results(monkeypatch):
+    matched = []
+    match_address = NetworkMatcher._match_address
+
+    def record(self, remote):
+        matched.append(remote)
+        return match_address(self, remote)
+
+    monkeypatch.setattr(NetworkMatcher, '_match_address', record)
+    matcher = _matcher('10.0.0.0/8', cache_size=2)
+
+    assert matcher.match('10.0.0.1')
+    assert not matcher.match('11.0.0.1')
+    # Cache hits (positive and negative) do not walk the tries
+    assert matcher.match('10.0.0.1')
+    assert not matcher.match('11.0.0.1')
+    assert matched == ['10.0.0.1', '11.0.0.1']
+
+    # Least recently used address is evicted
+    assert matcher.match('10.0.0.2')
+    assert matcher.match('10.0.0.1')
+    assert matched == ['10.0.0.1', '11.0.0.1', '10.0.0.2', '10.0.0.1']
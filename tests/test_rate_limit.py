@@ -0,0 +1,63 @@
+"""Tests for rate limiting of requests."""
+from types import SimpleNamespace
+
+import pytest
+from aiohttp.web_exceptions import HTTPTooManyRequests
+
+from custom_components.yandex_smart_home.const import CONF_BURST, CONF_RATE
+from custom_components.yandex_smart_home.core import helpers
+from custom_components.yandex_smart_home.core.helpers import Config, RateLimiter
+from custom_components.yandex_smart_home.core.http import YandexSmartHomeView
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace monotonic time used by token buckets with a manually advanced one."""
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(helpers, 'time', SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+class _Sensor:
+    rate_limited = 0
+
+    def record_rate_limited(self):
+        self.rate_limited += 1
+
+
+def test_burst_is_exhausted_and_refilled(clock):
+    limiter = RateLimiter({'query': {CONF_RATE: 0.5, CONF_BURST: 2}})
+
+    assert limiter.consume('user', '/user/devices/query')
+    assert limiter.consume('user', '/user/devices/query')
+    assert not limiter.consume('user', '/user/devices/query')
+
+    clock.now += 1
+    assert not limiter.consume('user', '/user/devices/query')
+
+    clock.now += 1
+    assert limiter.consume('user', '/user/devices/query')
+    assert not limiter.consume('user', '/user/devices/query')
+
+
+def test_limits_are_per_user_and_endpoint(clock):
+    limiter = RateLimiter({'action': {CONF_RATE: 0.1}})
+
+    assert limiter.consume('user', '/user/devices/action')
+    assert not limiter.consume('user', '/user/devices/action')
+    assert limiter.consume('other', '/user/devices/action')
+    # Endpoints without a configured limit are not limited
+    for _ in range(10):
+        assert limiter.consume('user', '/user/devices')
+
+
+def test_exceeded_limit_is_rejected(clock):
+    config = Config(should_expose=lambda entity_id: True, rate_limits={'devices': {CONF_RATE: 0.1}})
+    config.sensor_status = _Sensor()
+    user = SimpleNamespace(id='user')
+
+    YandexSmartHomeView._process_rate_limit(config, user, '/user/devices')
+    with pytest.raises(HTTPTooManyRequests):
+        YandexSmartHomeView._process_rate_limit(config, user, '/user/devices')
+
+    assert config.sensor_status.rate_limited == 1
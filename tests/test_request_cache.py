@@ -0,0 +1,56 @@
+"""Tests for deduplication of repeated requests."""
+import asyncio
+
+from custom_components.yandex_smart_home.core.helpers import RequestCache, is_successful_response
+
+
+def _run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def _make_factory(responses):
+    calls = []
+
+    def factory():
+        async def handle():
+            calls.append(None)
+            return responses[len(calls) - 1]
+
+        return handle()
+
+    return factory, calls
+
+
+def test_successful_response_is_reused():
+    response = {'request_id': 'r', 'payload': {'devices': []}}
+    factory, calls = _make_factory([response])
+
+    async def run():
+        cache = RequestCache(30, is_successful_response)
+        first = await cache.async_get_or_run('r', factory)
+        second = await cache.async_get_or_run('r', factory)
+        return first, second
+
+    assert _run(run()) == (response, response)
+    assert len(calls) == 1
+
+
+def test_error_response_is_not_reused():
+    error = {'request_id': 'r', 'payload': {'error_code': 'INTERNAL_ERROR'}}
+    response = {'request_id': 'r', 'payload': {'devices': []}}
+    factory, calls = _make_factory([error, response])
+
+    async def run():
+        cache = RequestCache(30, is_successful_response)
+        first = await cache.async_get_or_run('r', factory)
+        # let done callbacks run
+        await asyncio.sleep(0)
+        second = await cache.async_get_or_run('r', factory)
+        return first, second
+
+    assert _run(run()) == (error, response)
+    assert len(calls) == 2